@@ -0,0 +1,124 @@
+"""Benchmark the path finders on the queries of real games"""
+# /bhujanga_ai/benchmark_finders.py
+
+
+# Import the required modules
+from time import perf_counter
+
+# Import various helper functions and agents
+from helper import StepStatus
+from snakes.basesnake import BaseSnake
+from snakes.pathfinding_snakes import BFS_LookAhead_Snake
+from snakes.utils import BFS_Finder, AStar_Finder, BiBFS_Finder, DStarLite_Finder
+
+
+# Benchmark Settings
+BOARD_SIZES = [(10, 10), (20, 20), (30, 30)]
+SEEDS = range(5)
+MAX_MOVES = 2000
+FINDERS = [BFS_Finder, AStar_Finder, BiBFS_Finder]
+
+# Per move benchmark: the snake replans after every move
+PER_MOVE_SIZES = [(10, 10), (30, 30), (100, 100)]
+PER_MOVE_MOVES = 1000
+PER_MOVE_FINDERS = [BFS_Finder, DStarLite_Finder]
+
+
+# Play a game and keep a copy of the snake at every replan
+def collect_positions(height: int, width: int, seed: int) -> list:
+
+    agent = BFS_LookAhead_Snake(height, width, seed=seed)
+    positions = []
+
+    for _ in range(MAX_MOVES):
+        if not agent.finder.path_exists():
+            agent.finder.start = agent.head
+            agent.finder.end = agent.food
+            agent.find_path()
+            if not agent.finder.path_exists():
+                break
+            positions.append(agent.copy())
+
+        direction = agent.finder.path.pop(agent.head)
+        status, _ = agent.step(direction)
+        if status in (StepStatus.WALL, StepStatus.BODY):
+            break
+
+    return positions
+
+
+# Run the queries of the look ahead agents (head to food, head to tail) with the given finder
+def run_queries(finder_class, positions: list) -> dict:
+
+    stats = {'queries': 0, 'expanded': 0, 'path_length': 0, 'time': 0.0}
+    for snake in positions:
+        for end, exclude_tail in ((snake.food, False), (snake.tail, True)):
+            if end is None:
+                continue
+
+            finder = finder_class(snake, end)
+            start_time = perf_counter()
+            finder.find_path(exclude_tail=exclude_tail)
+            stats['time'] += perf_counter() - start_time
+
+            stats['queries'] += 1
+            stats['expanded'] += finder.expanded
+            stats['path_length'] += len(finder.path)
+
+    return stats
+
+
+# Replan towards the food after every move, with every finder on the same snake (which follows the BFS path)
+def run_per_move(height: int, width: int, seed: int) -> dict:
+
+    snake = BaseSnake(height, width, seed=seed)
+    finders = {finder_class: finder_class(snake, snake.food) for finder_class in PER_MOVE_FINDERS}
+    stats = {finder_class: {'queries': 0, 'expanded': 0, 'time': 0.0} for finder_class in PER_MOVE_FINDERS}
+
+    for _ in range(PER_MOVE_MOVES):
+        for finder_class, finder in finders.items():
+            finder.start = snake.head
+            finder.end = snake.food
+            start_time = perf_counter()
+            finder.find_path()
+            stats[finder_class]['time'] += perf_counter() - start_time
+            stats[finder_class]['queries'] += 1
+            stats[finder_class]['expanded'] += finder.expanded
+
+        path = finders[BFS_Finder].path
+        if not path:
+            break
+        status, _ = snake.step(path[snake.head])
+        if status in (StepStatus.WALL, StepStatus.BODY):
+            break
+
+    return stats
+
+
+if __name__ == '__main__':
+
+    for height, width in BOARD_SIZES:
+        positions = [position for seed in SEEDS for position in collect_positions(height, width, seed)]
+
+        print(f'\nBoard {width}x{height} - {len(positions)} positions')
+        print(f'{"Finder":<16}{"Queries":>10}{"Expanded/query":>18}{"Path length":>14}{"us/query":>12}')
+        for finder_class in FINDERS:
+            stats = run_queries(finder_class, positions)
+            queries = max(stats['queries'], 1)
+            print(
+                f'{finder_class.__name__:<16}{stats["queries"]:>10}{stats["expanded"] / queries:>18.1f}'
+                f'{stats["path_length"]:>14}{stats["time"] / queries * 1e6:>12.1f}'
+            )
+
+    for height, width in PER_MOVE_SIZES:
+        totals = {finder_class: {'queries': 0, 'expanded': 0, 'time': 0.0} for finder_class in PER_MOVE_FINDERS}
+        for seed in SEEDS:
+            for finder_class, stats in run_per_move(height, width, seed).items():
+                for key, value in stats.items():
+                    totals[finder_class][key] += value
+
+        print(f'\nBoard {width}x{height} - replanning after every move')
+        print(f'{"Finder":<18}{"Queries":>10}{"Expanded/move":>16}{"us/move":>12}')
+        for finder_class, stats in totals.items():
+            queries = max(stats['queries'], 1)
+            print(f'{finder_class.__name__:<18}{stats["queries"]:>10}{stats["expanded"] / queries:>16.1f}{stats["time"] / queries * 1e6:>12.1f}')
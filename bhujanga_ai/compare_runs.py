@@ -11,7 +11,8 @@ from glob import glob
 
 # Import various helper functions and agents
 from snakes.basesnake import BaseSnake
-from snakes.pathfinding_snakes import BFS_Basic_Snake, BFS_LookAhead_Snake, BFS_LookAhead_LongerPath_Snake
+from snakes.pathfinding_snakes import BFS_Basic_Snake, BFS_LookAhead_Snake, BFS_LookAhead_LongerPath_Snake, Hamiltonian_Snake
+from snakes.mcts_snakes import MCTS_Snake
 from game import Game
 
 
@@ -82,12 +83,16 @@ def Setup_Logging():
 
 
 def setup_agents():
-    return [BFS_Basic_Snake, BFS_LookAhead_Snake, BFS_LookAhead_LongerPath_Snake]
+    return [BFS_Basic_Snake, BFS_LookAhead_Snake, BFS_LookAhead_LongerPath_Snake, Hamiltonian_Snake, MCTS_Snake]
+
+
+# Keyword arguments of the agents (see `Game`), e.g. {BFS_LookAhead_Snake: {'use_safety_map': True}}
+AGENT_OPTIONS = {}
 
 
 def play_game(game):
     game.play()
-    return game.score
+    return game.seed, game.score
 
 
 def main():
@@ -98,14 +103,18 @@ def main():
     # Setup the agents
     agents = setup_agents()
 
-    # Storing score agent wise
+    # Storing score and seed agent wise
     scores = {}
+    seeds = {}
 
     # Games Info
+    # Game i of every agent is seeded with `base_seed + i`, so every agent plays the same games
+    # and any game can be replayed on its own from the recorded seed
     rounds = 10
+    base_seed = 0
     logger.info('Today we will test the following agents:')
     for agent in agents:
-        logger.info(f'\t- {agent.__name__}')
+        logger.info(f'\t- {agent.__name__}' + (f' {AGENT_OPTIONS[agent]}' if agent in AGENT_OPTIONS else ''))
     logger.info(f'Each agent will play {rounds} games.')
     print()
 
@@ -116,24 +125,30 @@ def main():
         print()
         logger.info(f'Starting Game for {agent.__name__}')
         scores[agent.__name__] = {}
+        seeds[agent.__name__] = {}
 
         with ProcessPoolExecutor(max_workers=16) as executor:
-            games = [Game(height=B_HEIGHT, width=B_WIDTH, agent=agent, log=False) for _ in range(rounds)]
+            games = [Game(height=B_HEIGHT, width=B_WIDTH, agent=agent, log=False, seed=base_seed + i, agent_options=AGENT_OPTIONS.get(agent)) for i in range(rounds)]
 
             # Submit the jobs to the executor
             futures = [executor.submit(play_game, game) for game in games]
 
-            # Getting the results
-            results = [future.result() for future in tqdm(as_completed(futures), total=len(futures), desc=f'{agent.__name__} Games')]
-        for i, result in enumerate(results):
-            scores[agent.__name__][i + 1] = result
-            logger.info(f'Score of Game {i+1}/{rounds} is {result}')
+            # Getting the results (they complete in any order, so they are matched back by seed)
+            results = dict(future.result() for future in tqdm(as_completed(futures), total=len(futures), desc=f'{agent.__name__} Games'))
+        for i, game in enumerate(games):
+            scores[agent.__name__][i + 1] = results[game.seed]
+            seeds[agent.__name__][i + 1] = game.seed
+            logger.info(f'Score of Game {i+1}/{rounds} (Seed {game.seed}) is {results[game.seed]}')
 
     # Store Scores
     json_path = os.path.join(MEDIA_DIR, r'Scores.json')
     with open(json_path, 'w') as jsonfile:
         json.dump(scores, jsonfile)
 
+    # Store Seeds
+    with open(os.path.join(MEDIA_DIR, r'Seeds.json'), 'w') as jsonfile:
+        json.dump(seeds, jsonfile)
+
     # Print Scores
     print()
     for agent in agents:
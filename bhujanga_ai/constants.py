@@ -8,6 +8,7 @@ LAP_TIME            = 10
 MEDIA_DIR           = r"""C:\Users\hrush\OneDrive - iitgn.ac.in\Desktop\Projects\Bhujanga-AI\Media"""
 COMPLETE_MODEL_DIR  = r"""C:\Users\hrush\OneDrive - iitgn.ac.in\Desktop\Projects\Bhujanga-AI\Models\Complete_Models"""
 CHECKPOINT_DIR      = r"""C:\Users\hrush\OneDrive - iitgn.ac.in\Desktop\Projects\Bhujanga-AI\Models\Checkpoints"""
+CYCLE_DIR           = r"""C:\Users\hrush\OneDrive - iitgn.ac.in\Desktop\Projects\Bhujanga-AI\Models\Cycles"""
 GIF_PATH            = os.path.join(MEDIA_DIR, 'GIFs')
 GRAPH_PATH          = os.path.join(MEDIA_DIR, 'Graphs')
 
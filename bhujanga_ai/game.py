@@ -6,6 +6,7 @@
 import logging
 import os
 import configparser
+from random import SystemRandom
 from time import perf_counter
 import torch
 from glob import glob1
@@ -14,9 +15,10 @@ from torch.utils.tensorboard import SummaryWriter
 
 # Import various helper and agent classes
 from snakes.basesnake import BaseSnake
-from snakes.pathfinding_snakes import BFS_Basic_Snake, BFS_LookAhead_Snake, BFS_LookAhead_LongerPath_Snake
-from snakes.reinforced_snakes import BASIC_Q_Snake
-from helper import BodyCollisionError, WallCollisionError, Direction, plot
+from snakes.pathfinding_snakes import BFS_Basic_Snake, BFS_LookAhead_Snake, BFS_LookAhead_LongerPath_Snake, Hamiltonian_Snake
+from snakes.mcts_snakes import MCTS_Snake
+from snakes.reinforced_snakes import DQN_Snake
+from helper import StepStatus, Direction, plot
 
 
 # Setup Config File
@@ -116,8 +118,13 @@ class Game:
         debug : bool = DEBUG,
         show_display : bool = True,
         save_gif : bool = False,
+        seed : int = None,
+        agent_options : dict = None,
     ) -> None:
-        """Initialize the game"""
+        """Initialize the game
+
+        `agent_options` are keyword arguments of the agent, e.g. `{'use_safety_map': True}` for the look ahead snakes.
+        """
 
         # Initialize the game's environment (board)
         self.board_width = width
@@ -126,8 +133,12 @@ class Game:
         self.save_gif = save_gif
         self.random_init = random_init
 
+        # Seed of the game's random generator (the game can be replayed from it)
+        self.seed = seed if seed is not None else SystemRandom().getrandbits(32)
+
         # Initialize the game's agent
-        self.agent = agent(height, width, random_init, log, debug)
+        self.agent_options = agent_options or {}
+        self.agent = agent(height, width, random_init, log, debug, seed=self.seed, **self.agent_options)
         self.agent : BaseSnake
 
         # Initialize the game's logging
@@ -165,8 +176,9 @@ class Game:
         # Clear the screen
         self.display.fill(BLACK)
 
-        # Draw the food
-        pygame.draw.rect(self.display, RED, (self.agent.food.x * BLOCKSIZE, self.agent.food.y * BLOCKSIZE, BLOCKSIZE - BORDER, BLOCKSIZE - BORDER))
+        # Draw the food (there is none once the snake fills the board)
+        if self.agent.food is not None:
+            pygame.draw.rect(self.display, RED, (self.agent.food.x * BLOCKSIZE, self.agent.food.y * BLOCKSIZE, BLOCKSIZE - BORDER, BLOCKSIZE - BORDER))
 
         # Draw the snake
         pygame.draw.rect(self.display, GREY, (self.agent.head.x * BLOCKSIZE, self.agent.head.y * BLOCKSIZE, BLOCKSIZE - BORDER, BLOCKSIZE - BORDER))
@@ -194,6 +206,7 @@ class Game:
         """Print the game details"""
         details = '\n\nGame Details\n\n'
         details += f'Board Size: {str(self.board_width)}x{str(self.board_height)}' + '\n'
+        details += f'Seed: {self.seed}' + '\n'
         details += f'Snake Details: {str(self.agent)}'
         if self.show_display:
             details += '\nDrawing Engine: PyGame\n'
@@ -209,66 +222,86 @@ class Game:
             logger.info(str(self))
 
         # The main game loop
+        # `seen_states` holds the hash of every state the agent planned from since the last food
         lap_time = perf_counter()
         score = 0
+        seen_states = set()
+        self.loop_detected = False
+
+        # Time taken by every decision of the agent (call of `find_path`) in microseconds
+        self.decision_times = []
         try:
             while True:
 
                 # Check if the user pressed the arrow key
                 # If yes then update the direction of the snake
-                # Check for collisions
-                try:
+                # Check for collisions (the status of the move, if any, made in this iteration)
+                status = StepStatus.OK
+
+                # Move the snake
+                if not self.agent.finder.path_exists():
+
+                    # The plans of a deterministic agent depend only on the state of the game
+                    # So planning again from a state seen since the last food proves that the snake is stuck in a loop
+                    # Other agents (random or bound by the clock) may get out of it, only the lap time ends their game
+                    if getattr(self.agent, 'deterministic', True):
+                        if self.agent.zobrist in seen_states:
+                            self.loop_detected = True
+                            if self.logging:
+                                logger.info('Loop Detected!')
+                            raise KeyboardInterrupt
+                        seen_states.add(self.agent.zobrist)
+
+                    if self.debug:
+                        logger.debug("Finding the path")
+                        logger.debug(f"Start: {(self.agent.head.x, self.agent.head.y)}, Goal: {self.agent.food.x, self.agent.food.y}")
+
+                    # Set the finder to the current state of the game
+                    self.agent.finder.start = self.agent.head
+                    self.agent.finder.end = self.agent.food
+
+                    # Find the path
+                    decision_start = perf_counter()
+                    self.agent.find_path()
+                    self.decision_times.append((perf_counter() - decision_start) * 1e6)
 
-                    # Move the snake
                     if not self.agent.finder.path_exists():
-
                         if self.debug:
-                            logger.debug("Finding the path")
-                            logger.debug(f"Start: {(self.agent.head.x, self.agent.head.y)}, Goal: {self.agent.food.x, self.agent.food.y}")
-
-                        # Set the finder to the current state of the game
-                        self.agent.finder.start = self.agent.head
-                        self.agent.finder.end = self.agent.food
-
-                        # Find the path
-                        self.agent.find_path()
-
-                        if not self.agent.finder.path_exists():
-                            if self.debug:
-                                logger.debug('Path Not found!')
-                            break
-                        else:
-                            if self.debug:
-                                logger.debug(f"Path found from {self.agent.finder.start} to {self.agent.finder.end}- " + str(self.agent.finder.path))
-
+                            logger.debug('Path Not found!')
+                        break
                     else:
-                        direction = self.agent.finder.path[self.agent.head]
-
                         if self.debug:
-                            logger.debug(f'Moving from {self.agent.head} in direction: {direction}')
-                        self.agent.finder.path.pop(self.agent.head)
-                        self.agent.move(direction)
+                            logger.debug(f"Path found from {self.agent.finder.start} to {self.agent.finder.end}- " + str(self.agent.finder.path))
 
-                    if PYGAME:
-                        pygame.event.get()
-                        self.render_pygame()
-                        self.clock.tick(SPEED)
+                else:
+                    direction = self.agent.finder.path[self.agent.head]
 
-                    if self.agent.score == 98:
-                        self.agent.score += 1
-                        raise KeyboardInterrupt
+                    if self.debug:
+                        logger.debug(f'Moving from {self.agent.head} in direction: {direction}')
+                    self.agent.finder.path.pop(self.agent.head)
+                    status, _ = self.agent.step(direction)
 
-                except WallCollisionError:
+                if status == StepStatus.WALL:
                     print("Wall Collision Error")
                     break
 
-                except BodyCollisionError:
+                if status == StepStatus.BODY:
                     print("Body Collision Error")
                     break
 
+                if PYGAME:
+                    pygame.event.get()
+                    self.render_pygame()
+                    self.clock.tick(SPEED)
+
+                # The snake filled the whole board, there is no food left to eat
+                if self.agent.food is None:
+                    raise KeyboardInterrupt
+
                 if self.agent.score > score:
                     score = self.agent.score
                     lap_time = perf_counter()
+                    seen_states.clear()
 
                 if perf_counter() - lap_time > LAP_TIME:
                     if self.logging:
@@ -282,10 +315,27 @@ class Game:
             if self.logging:
                 logger.info(f'Game Over - Your score is: {self.agent.score}')
 
+        if self.logging and self.decision_times:
+            logger.info(f'Decision time - p50: {self.decision_time(50):.1f} us, p99: {self.decision_time(99):.1f} us, Max: {max(self.decision_times):.1f} us')
+        if self.logging and getattr(self.agent, 'plan_cache', None) is not None:
+            stats = self.agent.plan_cache.stats()
+            logger.info(f"Plan cache - {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions, {stats['entries']} plans ({stats['bytes'] / 1024:.0f} KiB)")
+        if self.logging and isinstance(self.agent, MCTS_Snake):
+            logger.info(f'Rollouts - {self.agent.rollouts} played, {self.agent.rollouts_per_second:.0f} per second')
+
         # Final score
         self.score = self.agent.score
         return self.score
 
+    # Percentile of the decision times of the last game played
+    def decision_time(self, percentile : float = 99) -> float:
+        """The given percentile of the decision times (in microseconds) of the last game played"""
+
+        times = sorted(self.decision_times)
+        if not times:
+            return 0.0
+        return times[min(len(times) - 1, int(len(times) * percentile / 100))]
+
 
 # The Game class for RL Snake Game
 class RLGame(Game):
@@ -297,26 +347,20 @@ class RLGame(Game):
         """
 
         # Move the Snake and calculate the reward
-        try:
-            self.agent.move(action)
-            game_over = False
+        status, reward = self.agent.step(action)
+        game_over = status in (StepStatus.WALL, StepStatus.BODY)
 
-            # Save this frame
+        # Save this frame
+        if not game_over:
             if self.save_gif:
                 pygame.image.save(self.display, os.path.join(GIF_PATH, f"screenshot0{self.img_cnt}.png"))
                 self.img_cnt += 1
 
-        except WallCollisionError:
-            game_over = True
-            if self.save_gif:
-                self._save_gif()
-
-        except BodyCollisionError:
-            game_over = True
-            if self.save_gif:
-                self._save_gif()
+        elif self.save_gif:
+            self._save_gif()
 
-            return game_over, self.agent.score, self.agent.reward
+        if status == StepStatus.BODY:
+            return game_over, self.agent.score, reward
 
         # Step 5 - Update UI and clock
         if PYGAME:
@@ -324,12 +368,12 @@ class RLGame(Game):
             self.render_pygame()
             self.clock.tick(SPEED)
 
-        if self.agent.score == 98:
-            self.agent.score += 1
+        # The snake filled the whole board, there is no food left to eat
+        if self.agent.food is None:
             raise KeyboardInterrupt
 
         # Step 6 - Return Game Over and Score
-        return game_over, self.agent.score, self.agent.reward
+        return game_over, self.agent.score, reward
 
     # Required Variables for RL Snake Game
     def required(self, nth_model : int = None, nth_chk : int = None) -> tuple:
@@ -372,7 +416,7 @@ class RLGame(Game):
         record, average_score, total_reward, current_epsilon, MODEL_FPATH, CHK_FILE_PATH = self.required(nth_model, nth_chk)
         model = f'{self.agent.__name__} {n} (Without Short Train)'
         board_size = f'{self.board_width} X {self.board_height}'
-        self.agent : BASIC_Q_Snake
+        self.agent : DQN_Snake
 
         # Check if any checkpoint exists
         if os.path.exists(CHK_FILE_PATH):
@@ -479,15 +523,15 @@ class RLGame(Game):
         logger.debug("")
 
 
-def Initialize_Game(agent, RL=False, random_start: bool = False) -> Game:
+def Initialize_Game(agent, RL=False, random_start: bool = False, agent_options: dict = None) -> Game:
 
     # Initialize the Pygame Drawing Engine
     if PYGAME:
         # Initialize the Game
         if RL:
-            game = RLGame(agent=agent, log=LOGGING, debug=DEBUG, show_display=True, random_init=random_start)
+            game = RLGame(agent=agent, log=LOGGING, debug=DEBUG, show_display=True, random_init=random_start, agent_options=agent_options)
         else:
-            game = Game(agent=agent, log=LOGGING, debug=DEBUG, show_display=True, random_init=random_start)
+            game = Game(agent=agent, log=LOGGING, debug=DEBUG, show_display=True, random_init=random_start, agent_options=agent_options)
         if game.logging:
             logger.info('PyGame is selected as the drawing engine')
             logger.info("Game has been initialized")
@@ -495,9 +539,9 @@ def Initialize_Game(agent, RL=False, random_start: bool = False) -> Game:
     # Initialize the Game with no display
     else:
         if RL:
-            game = RLGame(agent=agent, log=LOGGING, debug=DEBUG, show_display=False, random_init=random_start)
+            game = RLGame(agent=agent, log=LOGGING, debug=DEBUG, show_display=False, random_init=random_start, agent_options=agent_options)
         else:
-            game = Game(agent=agent, log=LOGGING, debug=DEBUG, show_display=False, random_init=random_start)
+            game = Game(agent=agent, log=LOGGING, debug=DEBUG, show_display=False, random_init=random_start, agent_options=agent_options)
         if game.logging:
             logger.info('No Drawing engine is selected')
             logger.info("Game has been initialized")
@@ -507,7 +551,7 @@ def Initialize_Game(agent, RL=False, random_start: bool = False) -> Game:
 
 # Run the main function
 if __name__ == "__main__":
-    agents = [BFS_Basic_Snake, BFS_LookAhead_Snake, BFS_LookAhead_LongerPath_Snake, BASIC_Q_Snake]
+    agents = [BFS_Basic_Snake, BFS_LookAhead_Snake, BFS_LookAhead_LongerPath_Snake, Hamiltonian_Snake, MCTS_Snake, DQN_Snake]
     Ggame = Initialize_Game(agents[-1], RL=True, random_start=False)
     n = 3
 
@@ -6,6 +6,7 @@ import contextlib
 from glob import glob1
 from loguru import logger as lg
 from time import perf_counter
+from random import SystemRandom
 
 # Torch Imports
 import torch
@@ -33,7 +34,7 @@ from snakes.pathfinding_snakes import BFS_Basic_Snake, BFS_LookAhead_Snake, BFS_
 from snakes.reinforced_snakes import DQN_Snake, Double_Q_Snake
 
 # Helper Functions
-from helper import Direction, WallCollisionError, BodyCollisionError, plot
+from helper import Direction, StepStatus, plot
 
 
 TODAY       = datetime.now().strftime('%Y%m%d')
@@ -116,6 +117,7 @@ class GAME:
         debug           : bool = DEBUG,
         show_display    : bool = PYGAME,
         save_gif        : bool = False,
+        seed            : int = None,
     ) -> None:
         """Initialize the game"""
 
@@ -126,8 +128,11 @@ class GAME:
         self.save_gif       = save_gif
         self.random_init    = random_init
 
+        # Seed of the game's random generator (the game can be replayed from it)
+        self.seed           = seed if seed is not None else SystemRandom().getrandbits(32)
+
         # Initialize the game's agent
-        self.agent = agent(height, width, random_init, log, debug)
+        self.agent = agent(height, width, random_init, log, debug, seed=self.seed)
 
         # Initialize the game's logging
         self.logging = log
@@ -165,8 +170,9 @@ class GAME:
         # Clear the screen
         self.display.fill(BLACK)
 
-        # Draw the food
-        pygame.draw.rect(self.display, RED, (self.agent.food.x * BLOCKSIZE, self.agent.food.y * BLOCKSIZE, BLOCKSIZE - BORDER, BLOCKSIZE - BORDER))
+        # Draw the food (there is none once the snake fills the board)
+        if self.agent.food is not None:
+            pygame.draw.rect(self.display, RED, (self.agent.food.x * BLOCKSIZE, self.agent.food.y * BLOCKSIZE, BLOCKSIZE - BORDER, BLOCKSIZE - BORDER))
 
         # Draw the snake
         pygame.draw.rect(self.display, GREY, (self.agent.head.x * BLOCKSIZE, self.agent.head.y * BLOCKSIZE, BLOCKSIZE - BORDER, BLOCKSIZE - BORDER))
@@ -203,6 +209,7 @@ class GAME:
         if self.debug:
             self.logger.debug(f'Agent Name: {self.agent.__name__}')
             self.logger.debug(f'Board Sirze: {self.board_width}x{self.board_height}')
+            self.logger.debug(f'Seed: {self.seed}')
             self.logger.debug(f'Epochs: {EPOCHS}')
             self.logger.debug(f'Hidden Layers: {"x".join(str(x) for x in HIDDEN_LAYER_SIZES)}')
         return f'{self.agent.__name__} [{self.board_width}x{self.board_height}] [{EPOCHS}] [{"x".join(str(x) for x in HIDDEN_LAYER_SIZES)}]'
@@ -214,8 +221,8 @@ class GAME:
 class RLGame(GAME):
 
     @lg.catch
-    def __init__(self, agent: DQN_Snake, random_start: bool = False, nth_try: Union[int, None] = None, show_display: bool = PYGAME) -> None:
-        super().__init__(agent=agent, log=LOGGING, debug=DEBUG, show_display=show_display, random_init=random_start)
+    def __init__(self, agent: DQN_Snake, random_start: bool = False, nth_try: Union[int, None] = None, show_display: bool = PYGAME, seed: Union[int, None] = None) -> None:
+        super().__init__(agent=agent, log=LOGGING, debug=DEBUG, show_display=show_display, random_init=random_start, seed=seed)
 
         # Required Constants
         self.record          = 0
@@ -245,24 +252,17 @@ class RLGame(GAME):
         """
 
         # Move the Snake and calculate the reward
-        try:
-            self.agent.move(action)
-            game_over = False
+        status, reward = self.agent.step(action)
+        game_over = status in (StepStatus.WALL, StepStatus.BODY)
 
-            # Save this frame
+        # Save this frame
+        if not game_over:
             if self.save_gif:
                 pygame.image.save(self.display, os.path.join(GIF_PATH, f"screenshot0{self.img_cnt}.png"))
                 self.img_cnt += 1
 
-        except WallCollisionError:
-            game_over = True
-            if self.save_gif:
-                self._save_gif()
-
-        except BodyCollisionError:
-            game_over = True
-            if self.save_gif:
-                self._save_gif()
+        elif self.save_gif:
+            self._save_gif()
 
         # Step 5 - Update UI and clock
         if PYGAME:
@@ -270,14 +270,14 @@ class RLGame(GAME):
             self.render_pygame()
             self.clock.tick(SPEED)
 
-        if self.agent.score == 98:
-            self.agent.score += 1
+        # The snake filled the whole board, there is no food left to eat
+        if self.agent.food is None:
             raise KeyboardInterrupt
 
         # Step 6 - Return Game Over and Score
         if self.debug:
-            self.logger.debug(f'|{game_over}|{self.agent.score}|{self.agent.reward}|')
-        return game_over, self.agent.score, self.agent.reward
+            self.logger.debug(f'|{game_over}|{self.agent.score}|{reward}|')
+        return game_over, self.agent.score, reward
 
     # Load details from checkpoint file
     def load_checkpoint(self, checkpoint_file: str) -> tuple:
@@ -2,6 +2,7 @@
 This will contain all the requried helper functions and classes
 """
 # /bhujanga_ai/helper.py
+from functools import lru_cache
 import matplotlib.pyplot as plt
 from IPython import display
 
@@ -19,15 +20,38 @@ class BodyCollisionError(Exception):
     pass
 
 
+# Outcome of a single move of the snake
+class StepStatus:
+    """Status codes returned by `BaseSnake.step` (a cheaper alternative to the collision errors in hot loops)"""
+
+    OK   = 0
+    ATE  = 1
+    WALL = 2
+    BODY = 3
+
+
 # Point Class
 class Point:
-    """Class to help in defining the location of Snake's head and body and also the food"""
+    """Class to help in defining the location of Snake's head and body and also the food
+
+    Points are immutable. The cells of a board are interned (see `Board`), so they can be shared freely.
+    """
 
     # Changing it from namedtuple to normal class
-    def __init__(self, x, y, parent=None):
-        self.x = x
-        self.y = y
-        self.parent = parent
+    # Slots keep the object compact and the hash is computed only once
+    __slots__ = ('x', 'y', '_hash')
+
+    def __init__(self, x, y):
+        object.__setattr__(self, 'x', x)
+        object.__setattr__(self, 'y', y)
+        object.__setattr__(self, '_hash', hash((x, y)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Point is immutable')
+
+    # Pickling (used by the process pools) has to bypass the immutability
+    def __reduce__(self):
+        return Point, (self.x, self.y)
 
     # Adding and Subtracting Points
     # Used in changing the direction of the snake
@@ -63,15 +87,20 @@ class Point:
         return not isinstance(other, Point) or self.x != other.x or self.y != other.y
 
     # Creats the hash of the point object
-    # Don't know why I added this
-    # If I don't find any use then I will remove it
-    # TODO: Find out how this can be used
+    # Points are used as keys of the path dictionaries
     def __hash__(self) -> int:
-        return hash((self.x, self.y))
+        return self._hash
 
     # Copying the point object
+    # Points are immutable, so a copy is the point itself
     def copy(self) -> 'Point':
-        return Point(self.x, self.y)
+        return self
+
+    def __copy__(self) -> 'Point':
+        return self
+
+    def __deepcopy__(self, memo) -> 'Point':
+        return self
 
     # Distance function
     def distance(self, other: 'Point') -> int:
@@ -108,6 +137,10 @@ class Direction:
     DOWN_LEFT_LEFT   = Point(-2, 1)
     DOWN_RIGHT_RIGHT = Point(2, 1)
 
+    # The directions the snake can move in
+    # Its order is the order of the neighbour tables of `Board`
+    MOVES = (UP, DOWN, LEFT, RIGHT)
+
     # Multiplication of a point object by a scalar
     def __mul__(self, other: int) -> Point:
         return Point(self.value.x * other, self.value.y * other)
@@ -117,6 +150,54 @@ class Direction:
         return Point(self.value.x * other, self.value.y * other)
 
 
+# Board Class
+class Board:
+    """Interned cells and neighbour tables of a board of given size
+
+    Every cell is addressed by its index `y * width + x`. Use `get_board` to get the shared instance for a board size.
+    """
+
+    __slots__ = ('width', 'height', 'size', 'cells', 'index', 'neighbours')
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.size = width * height
+
+        # The interned point of every cell and the reverse lookup
+        self.cells = tuple(Point(x, y) for y in range(height) for x in range(width))
+        self.index = {point: idx for idx, point in enumerate(self.cells)}
+
+        # For every direction in `Direction.MOVES` the index of the adjacent cell (or -1 if it is off the board)
+        self.neighbours = tuple(
+            tuple(
+                (y + direction.y) * width + x + direction.x if 0 <= x + direction.x < width and 0 <= y + direction.y < height else -1
+                for y in range(height)
+                for x in range(width)
+            )
+            for direction in Direction.MOVES
+        )
+
+    # Index of the given point (-1 if it is off the board)
+    def cell(self, point: Point) -> int:
+        return self.index.get(point, -1)
+
+    # Unpickled boards are the shared instance of the receiving process
+    def __reduce__(self):
+        return get_board, (self.width, self.height)
+
+    def __str__(self) -> str:
+        return f"Board({self.width}x{self.height})"
+
+    __repr__ = __str__
+
+
+# One board instance per board size
+@lru_cache(maxsize=None)
+def get_board(width: int, height: int) -> Board:
+    return Board(width, height)
+
+
 # Plotting Function
 def plot(scores, mean_scores, fpath, title, save_plot=False):
 
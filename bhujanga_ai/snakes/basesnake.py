@@ -3,20 +3,28 @@
 
 
 # Import the required modules
-from random import randint, sample
-from collections import deque
+from random import Random, SystemRandom
+from array import array
 from copy import deepcopy
+from functools import lru_cache
 import os
 import logging
 import configparser
 
 
 # Import Helper Classes
-from helper import Point, Direction, WallCollisionError, BodyCollisionError
+from helper import Point, Direction, StepStatus, WallCollisionError, BodyCollisionError, get_board
 
 
 # Required Constants
-DIRECTIONS = [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT]
+DIRECTIONS = list(Direction.MOVES)
+DIRECTION_IDS = {direction: idx for idx, direction in enumerate(DIRECTIONS)}
+OPPOSITE = {
+    Direction.UP: Direction.DOWN,
+    Direction.DOWN: Direction.UP,
+    Direction.LEFT: Direction.RIGHT,
+    Direction.RIGHT: Direction.LEFT,
+}
 
 
 # Setup Config File
@@ -62,11 +70,125 @@ def Setup_Logging():
 logger = Setup_Logging()
 
 
+# Zobrist keys of a board
+class ZobristKeys:
+    """Random 64 bit keys for incremental hashing of the snake's state (head, body, direction and food)
+
+    The body is hashed as links: every body cell is keyed together with the direction towards the next segment,
+    so the head and the links describe the snake exactly.
+    """
+
+    __slots__ = ('head', 'link', 'food', 'direction')
+
+    def __init__(self, width : int, height : int) -> None:
+        # Keys are the same for every snake on a board of this size
+        rng = Random(f'zobrist {width}x{height}')
+        size = width * height
+
+        self.head = [rng.getrandbits(64) for _ in range(size)]
+        self.link = [[rng.getrandbits(64) for _ in range(size)] for _ in DIRECTIONS]
+        self.direction = [rng.getrandbits(64) for _ in DIRECTIONS]
+
+        # The food key of a missing food (cell -1) is the last one, which is 0
+        self.food = [rng.getrandbits(64) for _ in range(size)] + [0]
+
+
+# One set of keys per board size
+@lru_cache(maxsize=None)
+def zobrist_keys(width : int, height : int) -> ZobristKeys:
+    return ZobristKeys(width, height)
+
+
+# Read-only view over the snake's body
+class SnakeBody:
+    """View of the snake's body (head excluded), ordered from the neck to the tail"""
+
+    __slots__ = ('_snake',)
+
+    def __init__(self, snake : 'BaseSnake') -> None:
+        self._snake = snake
+
+    def __len__(self) -> int:
+        return self._snake._length - 1
+
+    def __getitem__(self, idx):
+        size = len(self)
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(size))]
+
+        if idx < 0:
+            idx += size
+        if not 0 <= idx < size:
+            raise IndexError('body index out of range')
+
+        snake = self._snake
+        return snake._cells[snake._ring[(snake._head_pos - 1 - idx) % snake._capacity]]
+
+    def __iter__(self):
+        snake = self._snake
+        for idx in range(1, snake._length):
+            yield snake._cells[snake._ring[(snake._head_pos - idx) % snake._capacity]]
+
+    # Membership is a single lookup in the occupancy grid
+    def __contains__(self, point : Point) -> bool:
+        if not isinstance(point, Point):
+            return False
+
+        snake = self._snake
+        if 0 <= point.x < snake.board_width and 0 <= point.y < snake.board_height:
+            cell = point.y * snake.board_width + point.x
+            return bool(snake._grid[cell]) and cell != snake._ring[snake._head_pos]
+        return False
+
+    def __str__(self) -> str:
+        return f'SnakeBody({list(self)})'
+
+    __repr__ = __str__
+
+
+# Snapshot of the snake's state
+class SnakeState:
+    """Compact snapshot of a snake's state, taken by `BaseSnake.snapshot` and applied by `BaseSnake.restore`"""
+
+    __slots__ = ('grid', 'ring', 'head_pos', 'length', 'free', 'free_pos', 'free_count', 'direction', 'food', 'score', 'zobrist', 'rng')
+
+    def __init__(self, snake : 'BaseSnake') -> None:
+        # Flat buffers are copied as a whole (a memcpy each)
+        self.grid = bytes(snake._grid)
+        self.ring = snake._ring[:]
+        self.free = snake._free[:]
+        self.free_pos = snake._free_pos[:]
+
+        # Scalars
+        self.head_pos = snake._head_pos
+        self.length = snake._length
+        self.free_count = snake._free_count
+        self.direction = snake.direction
+        self.food = snake._food_cell
+        self.score = snake.score
+        self.zobrist = snake.zobrist
+
+        # Position of the snake's random generator
+        self.rng = snake.rng.getstate()
+
+
 # The BaseSnake Class
 class BaseSnake:
     """The base snake class"""
 
-    def __init__(self, height : int, width : int, random_init : bool = False, log : bool = False, debug : bool = False) -> None:
+    # Board tables which never change for a given board size and are shared between copies
+    _shared = ('board', '_cells', '_neighbours', '_keys')
+
+    # Settings (immutable values) a copy takes over from its snake, subclasses add their own
+    _settings = ('board_width', 'board_height', 'logging', 'debug', 'name', 'seed', '_capacity')
+
+    # Whether the snake may turn back onto itself (it then collides with its body)
+    allow_reverse = False
+
+    # Reward of every `StepStatus` (OK, ATE, WALL, BODY)
+    REWARDS = (0, 10, -10, -10)
+
+    def __init__(self, height : int, width : int, random_init : bool = False, log : bool = False, debug : bool = False, seed : int = None) -> None:
 
         # Initialize the snake's environment (board)
         self.board_width = width
@@ -75,6 +197,38 @@ class BaseSnake:
         self.debug = debug
         self.name = 'Base Snake'
 
+        # Every snake draws from its own random generator, so a game can be replayed from its seed
+        # A fresh seed is drawn when none is given (and kept, so that it can be recorded)
+        self.seed = seed if seed is not None else SystemRandom().getrandbits(32)
+        self.rng = Random(self.seed)
+
+        # Flat representation of the board
+        # Every cell is addressed by its index `y * width + x`, see `helper.Board`
+        # `_grid` marks the cells occupied by the snake (head included)
+        # `_ring` is a fixed capacity ring buffer with the cell of every segment, `_head_pos` points at the head
+        # `_free` holds the cells not occupied by the snake in its first `_free_count` slots
+        # `_free_pos` maps every free cell to its slot in `_free` (used for swap-removal)
+        self.board = get_board(width, height)
+        self._capacity = self.board.size
+        self._cells = self.board.cells
+        self._neighbours = self.board.neighbours
+        self._grid = bytearray(self._capacity)
+        self._ring = array('i', [0]) * self._capacity
+        self._head_pos = 0
+        self._length = 0
+        self._free = array('i', range(self._capacity))
+        self._free_pos = array('i', range(self._capacity))
+        self._free_count = self._capacity
+        self._body_view = SnakeBody(self)
+
+        # Incremental Zobrist hash of (head, body, direction, food)
+        # Equal states have equal hashes, so it can be used as a key by caches or to detect loops
+        self._keys = zobrist_keys(width, height)
+        self.zobrist = 0
+
+        # Watchers are told about every change of the board (see `add_watcher`)
+        self._watchers = []
+
         # Initialize the snake's initial position (snake's head)
         # Here we can take two approaches:
         # 1. Random Initialization
@@ -89,38 +243,100 @@ class BaseSnake:
         # Initialize the snake's score
         self.score = len(self.body)
 
+    # Views over the ring buffer
+    @property
+    def head(self) -> Point:
+        return self._cells[self._ring[self._head_pos]]
+
+    @property
+    def body(self) -> SnakeBody:
+        return self._body_view
+
+    @property
+    def tail(self) -> Point:
+        if self._length < 2:
+            return None
+        return self._cells[self._ring[(self._head_pos - self._length + 1) % self._capacity]]
+
     # Initialize the snake (snake's head location)
     def _initialize_snake(self, random_init : bool) -> None:
         """Initialize the snake at random location or fixed location (center of board)"""
 
         # Initialize the snake's head at random location
         if random_init:
-            self.head = Point(randint(0, self.board_width - 1), randint(0, self.board_height - 1))
-            self.direction = sample(DIRECTIONS, 1)[0]
+            x, y = self.rng.randint(0, self.board_width - 1), self.rng.randint(0, self.board_height - 1)
+            self.direction = self.rng.sample(DIRECTIONS, 1)[0]
 
         # Initialize the snake's head at fixed location (center of board moving right)
         else:
-            self.head = Point(self.board_width // 2, self.board_height // 2)
+            x, y = self.board_width // 2, self.board_height // 2
             self.direction = Direction.RIGHT
 
-        # Here we use `deque` to store the snake's body
-        # It has faster appending and popping operations compared to list
-        # self.body = deque([self.head])
         # Thoughts: Not storing head in the body
-        self.body = deque()
-        self.tail = None
+        # The body is a view over the ring buffer, the head occupies the first slot
+        self._grid[:] = bytes(self._capacity)
+        self._free = array('i', range(self._capacity))
+        self._free_pos = array('i', range(self._capacity))
+        self._free_count = self._capacity
+        self._head_pos = 0
+        self._length = 1
+        self._ring[0] = y * self.board_width + x
+        self._occupy(self._ring[0])
+
+        # There is no food yet (see `_place_food`)
+        self._food_cell = -1
+        self.zobrist = self._keys.head[self._ring[0]] ^ self._keys.direction[DIRECTION_IDS[self.direction]]
+
+    # Mark the cell as occupied by the snake and swap-remove it from the free cells
+    def _occupy(self, cell : int) -> None:
+        pos = self._free_pos[cell]
+        self._free_count -= 1
+        last = self._free[self._free_count]
+        self._free[pos] = last
+        self._free_pos[last] = pos
+        self._grid[cell] = 1
+
+    # Mark the cell as free and append it to the free cells
+    def _release(self, cell : int) -> None:
+        self._free[self._free_count] = cell
+        self._free_pos[cell] = self._free_count
+        self._free_count += 1
+        self._grid[cell] = 0
+
+    # Direction id of the link from a segment to the next one (towards the head)
+    def _link_id(self, cell : int, following : int) -> int:
+        for dir_id, steps in enumerate(self._neighbours):
+            if steps[cell] == following:
+                return dir_id
+        raise ValueError(f'Cells {cell} and {following} are not adjacent')
+
+    # Hash of the state computed from scratch (the incremental `zobrist` always equals it)
+    def compute_zobrist(self) -> int:
+        keys = self._keys
+        cells = [self._ring[(self._head_pos - pos) % self._capacity] for pos in range(self._length)]
+        zobrist = keys.head[cells[0]] ^ keys.direction[DIRECTION_IDS[self.direction]] ^ keys.food[self._food_cell]
+        for following, cell in zip(cells, cells[1:]):
+            zobrist ^= keys.link[self._link_id(cell, following)][cell]
+        return zobrist
 
     # Place the food at random location on the board
     def _place_food(self) -> None:
         """Place the food at random location on the board"""
 
-        # Place the food at random location
-        # But check if the food is on the snake's body
-        # If so, then place the food at random location again
-        while True:
-            self.food = Point(randint(0, self.board_width - 1), randint(0, self.board_height - 1))
-            if self.food not in self.body and self.food != self.head:
-                break
+        # Place the food at a random free cell
+        # A single pick from the free cells, no matter how full the board is
+        # If the snake fills the whole board there is no place left for the food
+        if self._free_count == 0:
+            cell = -1
+        else:
+            cell = self._free[self.rng.randint(0, self._free_count - 1)]
+
+        self.zobrist ^= self._keys.food[self._food_cell] ^ self._keys.food[cell]
+        self._food_cell = cell
+        self.food = self._cells[cell] if cell >= 0 else None
+
+        for watcher in self._watchers:
+            watcher.food_changed(cell)
 
     # Reset the snake's environment (board)
     def reset(self, random_init : bool = False) -> None:
@@ -138,79 +354,266 @@ class BaseSnake:
         # Initialize the snake's score
         self.score = len(self.body)
 
-    # Move the snake in given direction
-    def move(self, direction : Direction) -> None:
-        """Move the snake in given direction"""
+        for watcher in self._watchers:
+            watcher.snake_reset()
+
+    # Watch the changes of the board
+    def add_watcher(self, watcher) -> None:
+        """Register a watcher of the board (e.g. a cache kept up to date as the snake moves)
+
+        The watcher is called with `cell_released(cell)` when the tail leaves a cell, `cell_blocked(cell)` when the head
+        moves into a cell, `food_changed(cell)` when the food is placed (-1 if there is no food) and `snake_reset()` when
+        the whole state changes at once (`reset`, `restore`, `undo`). Copies of the snake start without watchers.
+        """
+        self._watchers.append(watcher)
 
-        # Check if given direction is from Direction class
-        if not isinstance(direction, Point):
-            raise TypeError("Direction must be from Direction class")
-            # pass
+    def remove_watcher(self, watcher) -> None:
+        self._watchers.remove(watcher)
+
+    # Move the snake in given direction (hot loop variant, game over is returned instead of raised)
+    def step(self, direction : Direction) -> tuple:
+        """Move the snake in given direction and return the `(status, reward)` of the step
+
+        The status is one of `StepStatus` (OK, ATE, WALL or BODY), the reward is looked up in `REWARDS`.
+        On WALL or BODY the snake is left where it was. Invalid directions still raise.
+        """
+
+        dir_id = DIRECTION_IDS.get(direction) if isinstance(direction, Point) else None
 
         # Check if the given direction is valid
-        if direction not in DIRECTIONS:
+        if dir_id is None:
+            # Check if given direction is from Direction class
+            if not isinstance(direction, Point):
+                raise TypeError("Direction must be from Direction class")
             raise ValueError("Direction must be one of the following: UP, DOWN, LEFT, RIGHT")
-            # pass
 
         # Check if the given direction is not the opposite of the current direction
-        elif direction == -self.direction:
+        if not self.allow_reverse and direction == OPPOSITE[self.direction]:
             raise ValueError("Direction must be different from the opposite of the current direction")
 
-        else:
-            # Update the snake's direction
-            # print('Moving in direction:', direction)
+        # Check for any collisions (with walls, snake's body or food) at the next head cell
+        # Update the snake's body accordingly
+        status = self._check_collisions(self._neighbours[dir_id][self._ring[self._head_pos]], dir_id)
+
+        # Update the snake's direction (a collision leaves the snake, its direction included, where it was)
+        if status in (StepStatus.OK, StepStatus.ATE) and direction != self.direction:
+            self.zobrist ^= self._keys.direction[DIRECTION_IDS[self.direction]] ^ self._keys.direction[dir_id]
             self.direction = direction
 
-            # Update the snake's head position
-            self.body.appendleft(self.head)
-            self.head = self.head + self.direction
+        return status, self.REWARDS[status]
 
-            # Check for any collisions (with walls, snake's body or food)
-            # Update the snake's body accordingly
-            self._check_collisions()
+    # Move the snake in given direction
+    def move(self, direction : Direction) -> None:
+        """Move the snake in given direction (raises WallCollisionError or BodyCollisionError on game over)"""
+
+        status, _ = self.step(direction)
+        if status == StepStatus.WALL:
+            raise WallCollisionError
+        if status == StepStatus.BODY:
+            raise BodyCollisionError
 
     # Check for any collisions (with walls, snake's body or food)
-    def _check_collisions(self) -> None:
-        """Check for any collisions (with walls, snake's body or food)"""
+    def _check_collisions(self, cell : int, dir_id : int) -> int:
+        """Check the cell the head moves into (in the direction of id `dir_id`) for collisions (with walls, snake's body
+        or food) and advance the snake
+
+        Returns the `StepStatus` of the move. The snake is left untouched on a collision.
+        """
 
         # Check if the snake's head is out of bounds
-        if self.head.x < 0 or self.head.x > self.board_width - 1 or self.head.y < 0 or self.head.y > self.board_height - 1:
-            # raise ValueError("Snake's head is out of bounds")
-            raise WallCollisionError
+        if cell < 0:
+            return StepStatus.WALL
 
         # Check if the snake's head is on the food
-        if self.head == self.food:
-            # Place the food at random location on the board
-            self._place_food()
-            self.score += 1
-            self.tail = self.body.pop()
-            self.body.append(self.tail.copy())
-        else:
-            # Update the snake's body accordingly
-            self.body.pop()
-            if len(self.body) > 0:
-                self.tail = self.body.pop()
-                self.body.append(self.tail.copy())
+        grows = cell == self._food_cell
+        tail = self._ring[(self._head_pos - self._length + 1) % self._capacity]
 
         # Check if the snake's head is on the snake's body
-        # We check this after updating the snake's body
-        # Otherwise it may wrongly detect the snake's head as on the snake's body
-        # Specifically the tail point
-        if self.head in self.body or self.head == self.tail:
+        # The tail moves out of the way in the same step, unless the snake is growing
+        if self._grid[cell] and (grows or cell != tail):
             if self.debug:
                 logger.debug("Body Collision Detected")
-                logger.debug(f"Head Position: {self.head}")
+                logger.debug(f"Head Position: {self._cells[cell]}")
                 logger.debug(f"Body Position: {self.body}")
                 logger.debug(f"Tail Position: {self.tail}")
-            raise BodyCollisionError
+            return StepStatus.BODY
+
+        # Update the snake's body accordingly
+        # The old head becomes a body cell linked towards the new head
+        keys = self._keys
+        head = self._ring[self._head_pos]
+        self.zobrist ^= keys.head[head] ^ keys.link[dir_id][head] ^ keys.head[cell]
+
+        if grows:
+            self._length += 1
+        else:
+            # The tail is linked to the segment after it (the new head, if there is no body)
+            following = self._ring[(self._head_pos - self._length + 2) % self._capacity] if self._length > 1 else cell
+            self.zobrist ^= keys.link[self._link_id(tail, following)][tail]
+            self._release(tail)
+            for watcher in self._watchers:
+                watcher.cell_released(tail)
+
+        self._head_pos = (self._head_pos + 1) % self._capacity
+        self._ring[self._head_pos] = cell
+        self._occupy(cell)
+        for watcher in self._watchers:
+            watcher.cell_blocked(cell)
+
+        if grows:
+            # Place the food at random location on the board
+            self.score += 1
+            self._place_food()
+            return StepStatus.ATE
+
+        return StepStatus.OK
+
+    # Reversible move
+    def apply(self, direction : Direction) -> tuple:
+        """Move the snake in given direction and return a record for `undo`
+
+        The record is `(direction, tail, slot, food, zobrist, rng)`: the previous direction, the released tail cell
+        (-1 if the snake grew), the slot of the new head cell in the free cells, the previous food cell, the previous hash
+        and, if the snake eats, the position of the random generator before the new food is placed.
+        Collisions are raised the same way as in `move` and leave the snake untouched.
+        """
+
+        # Everything needed to undo the move is known before making it
+        cell = self._neighbours[DIRECTION_IDS[direction]][self._ring[self._head_pos]] if direction in DIRECTION_IDS else -1
+        tail = self._ring[(self._head_pos - self._length + 1) % self._capacity]
+        grows = cell == self._food_cell
+
+        # The released tail is appended to the free cells before the head cell is removed from them
+        slot = self._free_count if cell == tail and not grows else self._free_pos[cell]
+        record = (self.direction, -1 if grows else tail, slot, self._food_cell, self.zobrist, self.rng.getstate() if grows else None)
+
+        # A collision leaves the snake untouched
+        self.move(direction)
+        return record
+
+    # Undo a move made by `apply`
+    def undo(self, record : tuple) -> None:
+        """Restore the exact state before the move which returned the record (moves must be undone in reverse order)"""
+
+        direction, tail, slot, food, zobrist, rng = record
+        cell = self._ring[self._head_pos]
+
+        # Put the head cell back into its slot of the free cells (inverse of the swap-removal)
+        self._grid[cell] = 0
+        if slot < self._free_count:
+            moved = self._free[slot]
+            self._free[self._free_count] = moved
+            self._free_pos[moved] = self._free_count
+        self._free[slot] = cell
+        self._free_pos[cell] = slot
+        self._free_count += 1
+        self._head_pos = (self._head_pos - 1) % self._capacity
+
+        # The snake ate the food, so it shrinks back and the food placement is rewound
+        if tail < 0:
+            self._length -= 1
+            self.score -= 1
+            self.rng.setstate(rng)
+
+        # The tail was the last cell appended to the free cells
+        # Its ring slot may have been reused by the head when the snake filled the whole buffer
+        else:
+            self._free_count -= 1
+            self._grid[tail] = 1
+            self._ring[(self._head_pos - self._length + 1) % self._capacity] = tail
+
+        self.direction = direction
+        self._food_cell = food
+        self.food = self._cells[food] if food >= 0 else None
+        self.zobrist = zobrist
+
+        for watcher in self._watchers:
+            watcher.snake_reset()
+
+    # Take a snapshot of the snake's state
+    def snapshot(self) -> SnakeState:
+        """Capture head, body, direction, food, score and random generator position of the snake"""
+        return SnakeState(self)
+
+    # Restore the snake's state from a snapshot
+    def restore(self, state : SnakeState) -> None:
+        """Restore a snapshot taken by `snapshot` (the snapshot stays valid and can be restored again)"""
+
+        self._grid = bytearray(state.grid)
+        self._ring = state.ring[:]
+        self._free = state.free[:]
+        self._free_pos = state.free_pos[:]
+        self._head_pos = state.head_pos
+        self._length = state.length
+        self._free_count = state.free_count
+        self.direction = state.direction
+        self._food_cell = state.food
+        self.food = self._cells[state.food] if state.food >= 0 else None
+        self.score = state.score
+        self.zobrist = state.zobrist
+        self.rng.setstate(state.rng)
+
+        for watcher in self._watchers:
+            watcher.snake_reset()
+
+    # Where the snake ends up after following a path
+    def project_path(self, path : dict) -> tuple:
+        """Project the snake along a path from its head (in the format of `Finder.path`) without moving it
+
+        Returns `(body, direction)`: the cells of the snake once the path is followed, from the new head to the new tail,
+        and its last direction. The body is the path reversed followed by the old body, cut to the new length
+        (one more if the path ends on the food). Runs in O(path + length), the path must be collision free and may only
+        reach the food at its end (the food placed next is not known).
+        """
+
+        cells, neighbours = self._cells, self._neighbours
+        cell = self._ring[self._head_pos]
+        direction = self.direction
+
+        # Follow the path from the head
+        visited = []
+        while cells[cell] in path and len(visited) < self._capacity:
+            direction = path[cells[cell]]
+            cell = neighbours[DIRECTION_IDS[direction]][cell]
+            visited.append(cell)
+
+        length = self._length + (1 if visited and visited[-1] == self._food_cell else 0)
+        body = visited[::-1][:length]
+
+        # The rest of the body is the old snake from its head backwards
+        position = self._head_pos
+        while len(body) < length:
+            body.append(self._ring[position])
+            position = (position - 1) % self._capacity
+
+        return body, direction
 
     # Printing the Snake Object
     def __str__(self) -> str:
         return f'''Snake(\n\thead\t  = {self.head},\n\tbody\t  = {self.body},\n\tdirection =   {self.direction}\n)'''
 
+    # Deep copies share the board tables instead of duplicating them
+    def __deepcopy__(self, memo : dict) -> 'BaseSnake':
+        agent = self.__class__.__new__(self.__class__)
+        memo[id(self)] = agent
+        for key, value in self.__dict__.items():
+            agent.__dict__[key] = value if key in self._shared else deepcopy(value, memo)
+        return agent
+
     # Make a copy of the snake object
     def copy(self) -> 'BaseSnake':
-        # Creates a deepcopy of the snake
-        agent = deepcopy(self)
+        """Clone the snake for virtual simulation
+
+        Only the state (see `snapshot`), the settings in `_settings` and the board tables in `_shared` are taken over,
+        anything else (models, replay memory, helpers following the snake) is left out, so a copy never changes its snake.
+        """
+        agent = self.__class__.__new__(self.__class__)
+        for key in self._settings + self._shared:
+            if key in self.__dict__:
+                agent.__dict__[key] = self.__dict__[key]
+        agent._body_view = SnakeBody(agent)
+        agent._watchers = []
+        agent.rng = Random()
+        agent.restore(self.snapshot())
         agent.finder = None
         return agent
@@ -0,0 +1,343 @@
+from .basesnake import DIRECTION_IDS
+from .pathfinding_snakes import BFS_Basic_Snake
+from .utils import REVERSE_IDS
+from helper import Direction, StepStatus
+from array import array
+from math import log, sqrt
+from random import Random
+from time import perf_counter
+import os
+import logging
+import configparser
+
+# Setup Config File
+config = configparser.ConfigParser()
+config.read(r'bhujanga_ai\settings.ini')
+
+
+def Setup_Logging():
+    # Setting up the logger
+    logger = logging.getLogger(__name__)
+    logger.setLevel(logging.DEBUG)
+
+    formatter = logging.Formatter('[%(asctime)s] : %(name)s : %(levelname)s : %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+
+    LOG_PATH = config['LOGGING']['LOGGING_PATH']
+    DEBUG_PATH = config['LOGGING']['DEBUG_PATH']
+
+    # Check if file exists or create one
+    if not os.path.exists(LOG_PATH):
+        open(LOG_PATH, 'w').close()
+
+    if not os.path.exists(DEBUG_PATH):
+        open(DEBUG_PATH, 'w').close()
+
+    file_handler_LOG = logging.FileHandler(LOG_PATH)
+    file_handler_LOG.setLevel(logging.INFO)
+    file_handler_LOG.setFormatter(formatter)
+
+    file_handler_DEBUG = logging.FileHandler(DEBUG_PATH)
+    file_handler_DEBUG.setLevel(logging.DEBUG)
+    file_handler_DEBUG.setFormatter(formatter)
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(formatter)
+
+    logger.addHandler(file_handler_LOG)
+    logger.addHandler(file_handler_DEBUG)
+    logger.addHandler(stream)
+
+    return logger
+
+
+logger = Setup_Logging()
+
+
+# Value of every `StepStatus` (OK, ATE, WALL, BODY) for the search: one per food eaten, minus one for the game over
+STEP_VALUES = (0.0, 1.0, -1.0, -1.0)
+
+
+class RolloutSimulator:
+    """A bare copy of the state of a snake to play moves on: no Zobrist hash, no watchers, no Points
+
+    The buffers are allocated once for the board and overwritten in place by `load`, so a search can load the snake
+    and play a rollout from it as often as it likes without allocating. The food is placed with the simulator's own
+    random generator, the rollouts never touch the generator of the game.
+    """
+
+    def __init__(self, snake, seed : int | str = None) -> None:
+
+        # Board tables, shared with the snake
+        self.width = snake.board.width
+        self.capacity = snake._capacity
+        self.neighbours = snake._neighbours
+        self.rng = Random(seed)
+
+        # Same layout as the state of `BaseSnake` (see there)
+        self.grid = bytearray(self.capacity)
+        self.ring = array('i', [0]) * self.capacity
+        self.free = array('i', [0]) * self.capacity
+        self.free_pos = array('i', [0]) * self.capacity
+        self.head_pos = 0
+        self.length = 0
+        self.free_count = 0
+        self.food = -1
+        self.direction = 0
+        self.allow_reverse = snake.allow_reverse
+
+        # Scratch space for the candidate moves of a rollout step
+        self.moves = array('i', [0]) * 4
+
+    # Copy the state of the snake into the buffers
+    def load(self, snake) -> None:
+        self.grid[:] = snake._grid
+        self.ring[:] = snake._ring
+        self.free[:] = snake._free
+        self.free_pos[:] = snake._free_pos
+        self.head_pos = snake._head_pos
+        self.length = snake._length
+        self.free_count = snake._free_count
+        self.food = snake._food_cell
+        self.direction = DIRECTION_IDS[snake.direction]
+
+    # Move the head in the given direction (by id), same rules as `BaseSnake._check_collisions`
+    def step(self, direction_id : int) -> int:
+        """Move the snake in the given direction and return the `StepStatus` of the move"""
+
+        ring, capacity = self.ring, self.capacity
+        cell = self.neighbours[direction_id][ring[self.head_pos]]
+        if cell < 0:
+            return StepStatus.WALL
+
+        grows = cell == self.food
+        tail = ring[(self.head_pos - self.length + 1) % capacity]
+        if self.grid[cell] and (grows or cell != tail):
+            return StepStatus.BODY
+
+        self.direction = direction_id
+        if grows:
+            self.length += 1
+        else:
+            # Release the tail (append it to the free cells)
+            self.free[self.free_count] = tail
+            self.free_pos[tail] = self.free_count
+            self.free_count += 1
+            self.grid[tail] = 0
+
+        # Occupy the new head cell (swap-remove it from the free cells)
+        self.head_pos = (self.head_pos + 1) % capacity
+        ring[self.head_pos] = cell
+        pos = self.free_pos[cell]
+        self.free_count -= 1
+        last = self.free[self.free_count]
+        self.free[pos] = last
+        self.free_pos[last] = pos
+        self.grid[cell] = 1
+
+        if grows:
+            self.food = self.free[self.rng.randrange(self.free_count)] if self.free_count else -1
+            return StepStatus.ATE
+
+        return StepStatus.OK
+
+    # The moves which do not end the game right away
+    def safe_moves(self, out : array) -> int:
+        """Write the ids of the moves which do not run into a wall or the body to `out`, return how many there are"""
+
+        head = self.ring[self.head_pos]
+        tail = self.ring[(self.head_pos - self.length + 1) % self.capacity]
+        skip = -1 if self.allow_reverse else REVERSE_IDS[self.direction]
+        count = 0
+        for direction_id in range(4):
+            if direction_id == skip:
+                continue
+            cell = self.neighbours[direction_id][head]
+            if cell < 0 or (self.grid[cell] and cell != tail):
+                continue
+            out[count] = direction_id
+            count += 1
+        return count
+
+    # Play random (or greedy) moves until the game is over or the depth is reached
+    def rollout(self, depth : int, greedy : float, discount : float) -> float:
+        """Play up to `depth` moves and return their discounted value (see `STEP_VALUES`)
+
+        Every move is drawn from the moves which do not end the game right away. With probability `greedy` it is the
+        one closest to the food (by Manhattan distance), else a random one.
+        """
+
+        moves, rng, width = self.moves, self.rng, self.width
+        value, weight = 0.0, 1.0
+        for _ in range(depth):
+            count = self.safe_moves(moves)
+            if count == 0:
+                return value - weight  # Boxed in, every move ends the game
+
+            direction_id = moves[rng.randrange(count)]
+            if count > 1 and self.food >= 0 and rng.random() < greedy:
+                food_y, food_x = divmod(self.food, width)
+                best = None
+                for i in range(count):
+                    cell_y, cell_x = divmod(self.neighbours[moves[i]][self.ring[self.head_pos]], width)
+                    distance = abs(cell_x - food_x) + abs(cell_y - food_y)
+                    if best is None or distance < best:
+                        best, direction_id = distance, moves[i]
+
+            status = self.step(direction_id)
+            value += weight * STEP_VALUES[status]
+            if self.food < 0:
+                return value  # The board is full
+            weight *= discount
+
+        return value
+
+
+class MCTSNode:
+    """A node of the search tree: the statistics of a sequence of moves from the root"""
+
+    __slots__ = ('visits', 'value', 'children', 'untried')
+
+    def __init__(self, untried : list) -> None:
+        self.visits = 0
+        self.value = 0.0
+        self.children = [None, None, None, None]  # By direction id
+        self.untried = untried
+
+
+class MCTS_Snake(BFS_Basic_Snake):
+    """Picks every move by Monte Carlo Tree Search (UCT) over rollouts on a `RolloutSimulator`
+
+    The tree is open loop: a node stands for a sequence of moves, not for a state, since the food placed after a meal
+    is random. Every iteration loads the snake into the simulator, follows the tree by UCT, adds a node and plays a
+    rollout from it. The move taken is the most visited one at the root.
+    """
+
+    __name__ = 'MCTS Snake'
+
+    # Number of iterations (rollouts) per move, at least 1
+    rollout_budget = 200
+
+    # Number of moves of a rollout (None for the width plus the height of the board)
+    rollout_depth = None
+
+    # Probability of a rollout move towards the food (0 for purely random rollouts)
+    rollout_greedy = 0.5
+
+    # Exploration constant of UCT and the discount of the value of later steps
+    exploration = 1.0
+    discount = 0.95
+
+    # Search settings set on the snake itself are taken over by copies (the simulator is not)
+    _settings = BFS_Basic_Snake._settings + ('rollout_budget', 'rollout_depth', 'rollout_greedy', 'exploration', 'discount')
+
+    # The moves are picked by random rollouts, the same state may lead to another move
+    deterministic = False
+
+    # Rollouts played and seconds spent on them over the whole game (see `rollouts_per_second`)
+    rollouts = 0
+    rollout_time = 0.0
+
+    def __init__(self, height, width, random_init=False, log: bool = False, debug: bool = False, seed: int = None):
+        super().__init__(height, width, random_init, log, debug, seed)
+        if self.rollout_budget < 1:
+            raise ValueError('The rollout budget must be at least 1')
+
+        # The rollouts draw from a stream of their own, derived from the seed of the game (a string seed is hashed),
+        # so the food of a rollout does not replay the food of the game
+        self.simulator = RolloutSimulator(self, f'{self.seed} rollouts')
+        self.rollouts = 0
+        self.rollout_time = 0.0
+
+    # Speed of the search, to weigh against playing strength
+    @property
+    def rollouts_per_second(self) -> float:
+        return self.rollouts / self.rollout_time if self.rollout_time else 0.0
+
+    # New node with the moves the simulator can make from its current state
+    def _expand(self) -> MCTSNode:
+        moves = self.simulator.moves
+        return MCTSNode(list(moves[:self.simulator.safe_moves(moves)]))
+
+    def plan_path(self):
+
+        simulator = self.simulator
+        depth = self.rollout_depth or self.board.width + self.board.height
+        greedy, discount, exploration = self.rollout_greedy, self.discount, self.exploration
+
+        simulator.load(self)
+        root = self._expand()
+        if not root.untried:
+            self.finder.path = {}
+            return
+
+        start_time = perf_counter()
+        for _ in range(self.rollout_budget):
+            simulator.load(self)
+            node, visited = root, [root]
+            value, weight, alive = 0.0, 1.0, True
+
+            # Selection: follow the best child by UCT while every move of the node has been tried
+            while not node.untried and node.visits and alive:
+                log_visits = log(node.visits)
+                best, direction_id = None, -1
+                for i, child in enumerate(node.children):
+                    if child is None:
+                        continue
+                    score = child.value / child.visits + exploration * sqrt(log_visits / child.visits)
+                    if best is None or score > best:
+                        best, direction_id = score, i
+                if direction_id < 0:
+                    break  # Dead end, the node has no moves at all
+
+                status = simulator.step(direction_id)
+                value += weight * STEP_VALUES[status]
+                weight *= discount
+                node = node.children[direction_id]
+                visited.append(node)
+                alive = status < StepStatus.WALL and simulator.food >= 0
+
+            # Expansion: try one more move of the node
+            if alive and node.untried:
+                direction_id = node.untried.pop(simulator.rng.randrange(len(node.untried)))
+                status = simulator.step(direction_id)
+                value += weight * STEP_VALUES[status]
+                weight *= discount
+                node.children[direction_id] = node = self._expand()
+                visited.append(node)
+                alive = status < StepStatus.WALL and simulator.food >= 0
+
+            # Simulation: a boxed in node ends the game, else play it out
+            if alive:
+                if not node.untried and not any(node.children):
+                    value -= weight
+                else:
+                    value += weight * simulator.rollout(depth, greedy, discount)
+
+            # Backpropagation
+            for node in visited:
+                node.visits += 1
+                node.value += value
+
+        self.rollout_time += perf_counter() - start_time
+        self.rollouts += self.rollout_budget
+
+        # The most visited move, a safe move if no rollout was played (a budget set to 0 after the snake was made)
+        tried = [(child.visits, i) for i, child in enumerate(root.children) if child is not None]
+        visits, direction_id = max(tried) if tried else (0, root.untried[0])
+        if self.debug:
+            logger.debug(f'Moving {Direction.MOVES[direction_id]} after {visits} of {self.rollout_budget} rollouts, {self.rollouts_per_second:.0f} rollouts/s')
+        self.finder.path = {self.head: Direction.MOVES[direction_id]}
+
+    def __str__(self):
+        details = 'MCTS Snake\n'
+
+        # Print snake's body
+        details += f'Initial Snake Head: {self.head}\n'
+        details += f'Initial Snake Direction: {self.direction}\n'
+
+        # Print food
+        details += f'Initial Food Place: {self.food}'
+
+        return details
+
+    __repr__ = __str__
@@ -1,9 +1,11 @@
-from copy import deepcopy
-from .basesnake import BaseSnake
-from .utils import BFS_Finder
+from .basesnake import BaseSnake, DIRECTION_IDS
+from .bitboard import Bitboard
+from .utils import BFS_Finder, BiBFS_Finder, FoodDistanceField, SafetyMap, TranspositionCache, DeadlineExceeded, hamiltonian_cycle, REVERSE_IDS
+from helper import Direction
 import os
 import logging
 import configparser
+from time import perf_counter
 
 # Setup Config File
 config = configparser.ConfigParser()
@@ -53,17 +55,192 @@ class BFS_Basic_Snake(BaseSnake):
 
     __name__ = 'BFS Basic Snake'
 
-    def __init__(self, height, width, random_init=False,  log : bool = False, debug : bool = False):
-        super().__init__(height, width, random_init,  log, debug)
-        self.finder = BFS_Finder(self, self.food, self.logging, self.debug)
+    # Finder used for all the path searches (any `BFS_Finder` drop-in, e.g. `AStar_Finder`)
+    finder_class = BFS_Finder
+
+    # Finder used to check whether the virtual snake can still reach its tail (only the existence of a path matters)
+    tail_finder_class = BiBFS_Finder
+
+    # Whether the look ahead snakes read the path to the food off a `FoodDistanceField` instead of searching for it
+    # Off by default: the look ahead snake plays the same games with it (76.2 over 100 games on 10x10) but slower
+    # (130 against 118 us per move on 10x10, 35 against 19 on 20x20), the longer path snake plays worse with it
+    use_food_field = False
+    food_field = None
+
+    # Whether the look ahead snake keeps a `SafetyMap` of the free regions, to skip the tail check of a path whose
+    # first move shuts the head in a region too small for the snake, and to pick a move when the tail is out of reach
+    # Off by default: the bitboard already picks the move by region, the map makes no real difference to the scores
+    # (76.4 against 76.2 over 100 games on 10x10) and slows the moves down (142 against 113 us per move on 10x10,
+    # 44 against 21 on 20x20)
+    use_safety_map = False
+    safety_map = None
+
+    # Whether the look ahead snakes keep a `Bitboard` of the snake's cells on boards of up to `Bitboard.MAX_CELLS` cells,
+    # to check the tail of the projected snake with a flood fill and to move into the largest region when the tail
+    # is out of reach
+    use_bitboard = True
+    bitboard = None
+
+    # Whether the snake caches its plans by the state of the snake (see `find_path`) in a `TranspositionCache` of its
+    # own, so a cache lives for one game. Off by default: a deterministic snake only meets a state again when it
+    # loops, which ends the game. A cache can also be handed to the snakes of several games as `plan_cache`.
+    use_plan_cache = False
+    plan_cache = None
+
+    # Planning budget of a move in microseconds (None for no limit, see `plan_within_deadline`),
+    # the number of plans cut short by it and the move taken if the budget runs out
+    deadline_us = None
+    deadline_hits = 0
+    best_move = None
+
+    # Options set on the snake itself are taken over by copies
+    _settings = BaseSnake._settings + (
+        'finder_class', 'tail_finder_class', 'use_food_field', 'use_safety_map', 'use_bitboard', 'use_plan_cache',
+        'deadline_us',
+    )
+
+    def __init__(
+        self, height, width, random_init=False,  log : bool = False, debug : bool = False, seed : int = None,
+        use_food_field : bool = None, use_safety_map : bool = None,
+    ):
+        super().__init__(height, width, random_init,  log, debug, seed)
+        self.finder = self.finder_class(self, self.food, self.logging, self.debug)
+
+        # Options of this snake (None keeps the default of the class)
+        if use_food_field is not None:
+            self.use_food_field = use_food_field
+        if use_safety_map is not None:
+            self.use_safety_map = use_safety_map
+
+        if self.use_plan_cache and self.deterministic:
+            self.plan_cache = TranspositionCache()
+
+    # Whether the plan only depends on the state of the game (a plan cut short by the deadline depends on the timing)
+    @property
+    def deterministic(self) -> bool:
+        return self.deadline_us is None
+
+    # What the plans depend on besides the state: the agent, its searches and the helpers it plays with
+    @property
+    def plan_config(self) -> tuple:
+        return (
+            type(self), self.finder_class, self.tail_finder_class, self.board.width, self.board.height, self.allow_reverse,
+            self.food_field is not None, self.safety_map is not None, self.bitboard is not None,
+        )
+
+    # Find the path to the food (the plan for the current state), looked up in the plan cache first
+    def find_path(self):
 
-    # Find the path to the food
+        # Plans are deterministic in the state of the snake (the zobrist hash covers the head, body, direction
+        # and food), the configuration of the agent tells apart the plans of agents sharing a cache
+        key = None
+        if self.plan_cache is not None:
+            key = (self.plan_config, self.zobrist)
+            plan = self.plan_cache.get(key)
+            if plan is not None:
+                self.finder.path = dict(plan)
+                return
+
+        if self.deadline_us is None:
+            self.plan_path()
+        elif not self.plan_within_deadline():
+            return  # A plan cut short depends on the timing, it is not cached
+
+        if key is not None:
+            self.plan_cache.put(key, tuple(self.finder.path.items()))
+
+    # Anytime planning: plan as usual, but within the budget of `deadline_us` microseconds
+    def plan_within_deadline(self) -> bool:
+        """Plan with the searches giving up past the deadline, then the best safe move found so far is taken
+
+        The best move starts as the move into the free cell with the most room (see `free_move`) and is replaced by
+        the first move of the path to the food once the projected snake is found to reach its tail along it.
+        Returns whether the plan was completed.
+        """
+
+        self.finder.deadline = perf_counter() + self.deadline_us / 1e6
+        self.finder.expired = False
+        self.best_move = self.free_move()
+        expired = False
+        try:
+            self.plan_path()
+        except DeadlineExceeded:
+            expired = True
+            self.finder.path = {self.head: self.best_move} if self.best_move is not None else {}
+        finally:
+            self.finder.deadline = None
+
+        # A search may also stop early on its own and return what it has (see `BFS_Finder.find_longer_path`)
+        if expired or self.finder.expired:
+            self.deadline_hits += 1
+            if self.debug:
+                logger.debug(f'Deadline of {self.deadline_us} us hit, moving {self.finder.path.get(self.head)}')
+            return False
+        return True
+
+    # Whether the head of the projected snake (see `BaseSnake.project_path`) can reach its tail
+    def projected_tail_reachable(self, body: list, direction: Direction) -> bool:
+        if self.bitboard is not None:
+            return self.bitboard.tail_reachable(body, direction, self.finder.deadline)
+
+        tail_finder = self.tail_finder_class(self, None, self.logging, self.debug)
+        tail_finder.deadline = self.finder.deadline
+        return tail_finder.find_tail_path(body, direction)
+
+    # A move into a free cell (or the tail), the one with the most room first
+    def free_move(self) -> Direction:
+        """The move to take without a plan: into a free cell or the tail (None if every move ends the game)
+
+        With a bitboard (or a safety map) the moves are ranked by the free region they lead into: room for the whole
+        snake first, then the closest to the food, then the largest region. The tail moves out of the way, a move into
+        it always has room. Without one, or when the deadline passes while the regions are measured, only the free
+        cells next to the move count (a dead end last).
+        """
+
+        neighbours = self.board.neighbours
+        width = self.board.width
+        grid = self._grid
+        head = self._ring[self._head_pos]
+        tail = self._ring[(self._head_pos - self._length + 1) % self._capacity] if self._length > 1 else -1
+        food = self._food_cell
+        skip = -1 if self.allow_reverse else REVERSE_IDS[DIRECTION_IDS[self.direction]]
+
+        moves = []
+        for direction_id, steps in enumerate(neighbours):
+            cell = steps[head]
+            if cell < 0 or direction_id == skip or (grid[cell] and cell != tail):
+                continue
+            room = sum(1 for around in neighbours if around[cell] >= 0 and (not grid[around[cell]] or around[cell] == tail))
+            distance = abs(cell % width - food % width) + abs(cell // width - food // width) if food >= 0 else 0
+            moves.append((Direction.MOVES[direction_id], cell, room, distance))
+        if not moves:
+            return None
+
+        regions = None
+        if len(moves) > 1:
+            try:
+                if self.bitboard is not None:
+                    regions = self.bitboard.move_regions(self.finder.deadline)
+                elif self.safety_map is not None:
+                    regions = self.safety_map.move_regions()
+            except DeadlineExceeded:
+                pass
+
+        def rank(move):
+            direction, cell, room, distance = move
+            if regions is None:
+                return (room > 0, -distance, room)
+            region = self.board.size if cell == tail else regions.get(direction, 0)
+            return (min(region, self._length), -distance, region)
+
+        return max(moves, key=rank)[0]
+
+    # Plan the path to the food
     # This may look redundant for this snake
     # But it is in line with the preparation of framework for more advance snakes
-    def find_path(self):
+    def plan_path(self):
 
         self.finder.find_path()
-        # return self.finder.get_path_directions()
 
     def move_snake(self):
         directions = self.finder.find_path()
@@ -89,7 +266,11 @@ class BFS_Basic_Snake(BaseSnake):
     __repr__ = __str__
 
     def copy(self) -> 'BaseSnake':
-        return deepcopy(self)
+        # Clone the snake along with a finder bound to the clone
+        # (the field, the map and the bitboard follow the original snake only, copies are left without them)
+        agent = super().copy()
+        agent.finder = self.finder.copy(agent)
+        return agent
 
 
 # BREADTH FIRST SEARCH (BFS - Look Ahead) Snake
@@ -97,20 +278,35 @@ class BFS_LookAhead_Snake(BFS_Basic_Snake):
 
     __name__ = 'BFS Look Ahead Snake'
 
-    def __init__(self, height, width, random_init=False,  log : bool = False, debug : bool = False):
-        super().__init__(height, width, random_init,  log, debug)
-        self.finder = BFS_Finder(self, self.food, self.logging, self.debug)
+    def __init__(
+        self, height, width, random_init=False,  log : bool = False, debug : bool = False, seed : int = None,
+        use_food_field : bool = None, use_safety_map : bool = None,
+    ):
+        super().__init__(height, width, random_init,  log, debug, seed, use_food_field, use_safety_map)
+        if self.use_food_field:
+            self.food_field = FoodDistanceField(self)
+        if self.use_safety_map:
+            self.safety_map = SafetyMap(self)
+        if self.use_bitboard and self.board.size <= Bitboard.MAX_CELLS:
+            self.bitboard = Bitboard(self)
 
-    def find_path(self):
+    def plan_path(self):
 
         # When flag 0, follow all steps
         # When flag 1, jump to step 4
         flag = 0
 
-        # Step 1: Find the path to the food using BFS
+        # Step 1: Find the path to the food using BFS (or read it off the distance field towards the food)
+        # If the body blocks every path, search again counting the body cells the snake will have left
+        # by the time it gets there as free (time aware search)
         # If the path exists, then move to step 2
         # If path doesnot exist, then move to step 4
-        self.finder.find_path()
+        if self.food_field is not None:
+            self.finder.path = self.food_field.path()
+        else:
+            self.finder.find_path()
+        if not self.finder.path_exists():
+            self.finder.find_path(time_aware=True)
 
         # If the length of the snake is 1 i.e has no tail, return the path directly
         if len(self.body) == 0:
@@ -124,42 +320,42 @@ class BFS_LookAhead_Snake(BFS_Basic_Snake):
             if self.finder.debug:
                 logger.debug(f'Found a direct path from {self.head} to {self.food}')
 
-        # Step 2: Create a virtual snake and move it along the path
-        # If the virtual snake can reach the tail of the original snake, then move to step 3
-        # If the virtual snake cannot reach the tail of the original snake, then move to step 4
+        # Pre-filter of step 2: a path whose first move shuts the head in a region too small for the snake,
+        # away from its tail, fails the tail check anyway (then move to step 4)
+        if flag == 0 and self.safety_map is not None:
+            first = self.board.neighbours[DIRECTION_IDS[self.finder.path[self.head]]][self.board.cell(self.head)]
+            if not self.safety_map.is_safe(self.board.cells[first]):
+                if self.finder.debug:
+                    logger.debug('The first move of the path leads into a region too small for the snake')
+                flag = 1
+
+        # Step 2: Project the snake along the path (where a virtual snake following it would end up)
+        # If the projected snake can reach its tail, then move to step 3
+        # If the projected snake cannot reach its tail, then move to step 4
         if flag == 0:
             if self.finder.debug:
                 logger.debug(f'Position of Original Snake: Head - {self.head}, Tail - {self.body[-1]}')
-                logger.debug('Creating and moving a virtual snake')
-
-            # virtual_snake = self.copy()  # copy the snake object
-            virtual_snake = deepcopy(self)  # copy the snake object
+                logger.debug('Projecting the snake along the path')
 
-            # Move the virtual snake along the path
-            # virtual_snake.finder = self.finder.copy()
-            virtual_snake.finder = deepcopy(self.finder)
-            while virtual_snake.finder.path:
-                direction = virtual_snake.finder.path[virtual_snake.head]
-                virtual_snake.finder.path.pop(virtual_snake.head)
-                virtual_snake.move(direction)
+            # The body after the path is read off the path and the current body, without copying or moving the snake
+            body, direction = self.project_path(self.finder.path)
 
-            # Now, check if the path to the tail of the virtual snake is reachable
-            virtual_snake.finder = BFS_Finder(virtual_snake, virtual_snake.tail, self.logging, self.debug)
-            virtual_snake.finder.start = virtual_snake.head
-            virtual_snake.finder.find_path(exclude_tail=True)
+            # Now, check if the tail of the projected snake is reachable from its head
+            reachable = self.projected_tail_reachable(body, direction)
 
             if self.finder.debug:
-                logger.debug(f'Position of Virtual Snake: Head - {virtual_snake.head}, Tail - {virtual_snake.tail}')
-                logger.debug(f'Virtual snake path finding path from {virtual_snake.finder.start} to {virtual_snake.finder.end}')
-                logger.debug(f'Virtual snake path exists: {virtual_snake.finder.path_exists()}')
+                logger.debug(f'Position of Projected Snake: Head - {self.board.cells[body[0]]}, Tail - {self.board.cells[body[-1]]}')
+                logger.debug(f'Projected snake path exists: {reachable}')
 
-            if not virtual_snake.finder.path_exists():
+            if not reachable:
                 if self.finder.debug:
-                    logger.debug('Virtual snake did not find a path to its tail')
+                    logger.debug('Projected snake did not find a path to its tail')
                 flag = 1
             else:
+                # The first move towards the food is now known to be safe
+                self.best_move = self.finder.path[self.head]
                 if self.finder.debug:
-                    logger.debug('Virtual snake found a path to its tail')
+                    logger.debug('Projected snake found a path to its tail')
 
         # Step 3: Move the snake to the tail of the original snake
         if flag == 0:
@@ -177,6 +373,15 @@ class BFS_LookAhead_Snake(BFS_Basic_Snake):
                 logger.debug(f'Start(Head): {self.finder.start}, Goal(Tail): {self.finder.end}, Food Place: {self.food}')
             self.finder.find_path(exclude_tail=True)
 
+            # Without a path to the tail, move into the largest region left
+            regions_map = self.safety_map if self.safety_map is not None else self.bitboard
+            if not self.finder.path_exists() and regions_map is not None:
+                regions = regions_map.move_regions()
+                if regions:
+                    if self.finder.debug:
+                        logger.debug(f'No path to the tail, regions of the moves: {regions}')
+                    self.finder.path = {self.head: max(regions, key=regions.get)}
+
     def move_snake(self):
         directions = self.finder.find_path()
         try:
@@ -206,20 +411,34 @@ class BFS_LookAhead_LongerPath_Snake(BFS_Basic_Snake):
 
     __name__ = 'BFS Look Ahead with Longer Path Snake'
 
-    def __init__(self, height, width, random_init=False, log: bool = False, debug: bool = False):
-        super().__init__(height, width, random_init, log, debug)
-        self.finder = BFS_Finder(self, self.food, self.logging, self.debug)
+    # The field does not help the longer path: 86.9 with it against 96.6 without over 100 games on 10x10
+    use_food_field = False
 
-    def find_path(self):
+    def __init__(
+        self, height, width, random_init=False, log: bool = False, debug: bool = False, seed: int = None,
+        use_food_field: bool = None, use_safety_map: bool = None,
+    ):
+        super().__init__(height, width, random_init, log, debug, seed, use_food_field, use_safety_map)
+        if self.use_food_field:
+            self.food_field = FoodDistanceField(self)
+        if self.use_safety_map:
+            self.safety_map = SafetyMap(self)
+        if self.use_bitboard and self.board.size <= Bitboard.MAX_CELLS:
+            self.bitboard = Bitboard(self)
+
+    def plan_path(self):
 
         # When flag 0, follow all steps
         # When flag 1, jump to step 4
         flag = 0
 
-        # Step 1: Find the path to the food using BFS
+        # Step 1: Find the path to the food using BFS (or read it off the distance field towards the food)
         # If the path exists, then move to step 2
         # If path doesnot exist, then move to step 4
-        self.finder.find_path()
+        if self.food_field is not None:
+            self.finder.path = self.food_field.path()
+        else:
+            self.finder.find_path()
 
         # If the length of the snake is 1 i.e has no tail, return the path directly
         if len(self.body) == 0:
@@ -234,45 +453,33 @@ class BFS_LookAhead_LongerPath_Snake(BFS_Basic_Snake):
             if self.finder.debug:
                 logger.debug(f'Found a direct path from {self.head} to {self.food}')
 
-        # Step 2: Create a virtual snake and move it along the path
-        # If the virtual snake can reach the tail of the original snake, then move to step 3
-        # If the virtual snake cannot reach the tail of the original snake, then move to step 4
+        # Step 2: Project the snake along the path (where a virtual snake following it would end up)
+        # If the projected snake can reach its tail, then move to step 3
+        # If the projected snake cannot reach its tail, then move to step 4
         if flag == 0:
             if self.finder.debug:
                 logger.debug(f'Position of Original Snake: Head - {self.head}, Tail - {self.body[-1]}')
-                logger.debug('Creating and moving a virtual snake')
-
-            # virtual_snake = self.copy()  # Creates a deepcopy of the snake object
-            virtual_snake = deepcopy(self)  # Creates a deepcopy of the snake object
+                logger.debug('Projecting the snake along the path')
 
-            # Move the virtual snake along the path
-            virtual_snake.finder = deepcopy(self.finder)
-            if self.finder.debug:
-                logger.debug(f'Moving virtual snake from {virtual_snake.finder.start} to {virtual_snake.finder.end}')
-            while virtual_snake.finder.path_exists():
-                direction = virtual_snake.finder.path[virtual_snake.head]
-                virtual_snake.finder.path.pop(virtual_snake.head)
-                virtual_snake.move(direction)
-
-            # Now, check if the path to the tail of the virtual snake is reachable
-            virtual_snake.finder = BFS_Finder(virtual_snake, virtual_snake.tail, self.logging, self.debug)
-            virtual_snake.finder.start = virtual_snake.head
-            if self.finder.debug:
-                logger.debug(f'Position of Virtual Snake: Head - {virtual_snake.head}, Tail - {virtual_snake.tail}')
-                logger.debug(f'Virtual snake finding path from {virtual_snake.finder.start} to {virtual_snake.finder.end}')
+            # The body after the path is read off the path and the current body, without copying or moving the snake
+            body, direction = self.project_path(self.finder.path)
 
-            virtual_snake.finder.find_path(exclude_tail=True)
+            # Now, check if the tail of the projected snake is reachable from its head
+            reachable = self.projected_tail_reachable(body, direction)
 
             if self.finder.debug:
-                logger.debug(f'Virtual snake path exists: {virtual_snake.finder.path_exists()}')
+                logger.debug(f'Position of Projected Snake: Head - {self.board.cells[body[0]]}, Tail - {self.board.cells[body[-1]]}')
+                logger.debug(f'Projected snake path exists: {reachable}')
 
-            if not virtual_snake.finder.path_exists():
+            if not reachable:
                 if self.finder.debug:
-                    logger.debug('Virtual snake did not find a path to its tail')
+                    logger.debug('Projected snake did not find a path to its tail')
                 flag = 1
             else:
+                # The first move towards the food is now known to be safe
+                self.best_move = self.finder.path[self.head]
                 if self.finder.debug:
-                    logger.debug('Virtual snake found a path to its tail')
+                    logger.debug('Projected snake found a path to its tail')
 
         # Step 3: Move the snake to the tail of the original snake
         if flag == 0:
@@ -280,51 +487,19 @@ class BFS_LookAhead_LongerPath_Snake(BFS_Basic_Snake):
 
         # Time for our implementation of the longer path
         # Step 4: If no path exists, then follow the tail of the original snake with a longer path
+        # A shortest path to the tail is stretched with detours (see `BFS_Finder.find_longer_path`)
         if flag == 1:
 
             self.finder : BFS_Finder
-            neighbours = self.finder.get_neighbors(self.head, exclude_tail=True)
-            pos = None
-            path_lenght = 0
+            self.finder.start = self.head
+            self.finder.end = self.tail.copy()
 
             if self.finder.debug:
                 logger.debug('Searching for a longer path from the tail of the original snake')
-                logger.debug(f'Neighbours of {self.head}: {neighbours}')
-
-            for neighbour in neighbours:
-                virtual_snake = self.copy()
-                virtual_snake.debug = self.debug
-                virtual_snake.finder.start = neighbour
-                virtual_snake.finder.end = self.tail.copy()
-
-                if self.finder.debug:
-                    logger.debug(f'Checking neighbor {neighbour} - End Point: {virtual_snake.finder.end}')
-
-                virtual_snake.finder.find_path(exclude_tail=True)
 
-                # Check for longer path
+            if self.finder.find_longer_path():
                 if self.finder.debug:
-                    logger.debug(f'The length of path from {neighbour} to {virtual_snake.finder.end} is {len(virtual_snake.finder.path)}')
-                    logger.debug(f'The path is {virtual_snake.finder.path}')
-
-                if len(virtual_snake.finder.path) > path_lenght:
-                    path_lenght = len(virtual_snake.finder.path)
-                    path = {}
-                    pos = neighbour
-                    path = virtual_snake.finder.path.copy()
-
-                virtual_snake = None
-
-            # Set the path to the tail of the original snake to be the longer path
-            if path_lenght > 0:
-
-                if self.finder.debug:
-                    logger.debug(f'Longer path found from {self.head} to {self.tail} from {pos} with {path_lenght + 1} steps')
-
-                first_turn = pos - self.head
-                path[self.head] = first_turn
-                self.finder.path = path
-                self.finder.start = self.head
+                    logger.debug(f'Longer path found from {self.head} to {self.tail} with {len(self.finder.path)} steps')
 
             else:
                 if self.finder.debug:
@@ -332,6 +507,7 @@ class BFS_LookAhead_LongerPath_Snake(BFS_Basic_Snake):
                     logger.debug(f'Moving to the point farthest from tail - {self.tail}')
 
                 try:
+                    neighbours = self.finder.get_neighbors(self.head, exclude_tail=True)
                     pos = max(neighbours, key=lambda x: x.distance(self.tail))
                     path = {self.head: pos - self.head}
                     self.finder.path = path
@@ -351,3 +527,85 @@ class BFS_LookAhead_LongerPath_Snake(BFS_Basic_Snake):
         return details
 
     __repr__ = __str__
+
+
+# HAMILTONIAN CYCLE Snake
+class Hamiltonian_Snake(BFS_Basic_Snake):
+    """Follows a Hamiltonian cycle of the board (see `hamiltonian_cycle`), cutting ahead along it while it is safe
+
+    The body always lies within the stretch of the cycle from the tail to the head, so every cell after the head up
+    to the tail is free. Moving to a neighbour in that stretch (skipping the cells in between) keeps it that way,
+    the snake never cuts past the food. Every move is a few lookups in the position of the cells along the cycle.
+    """
+
+    __name__ = 'Hamiltonian Snake'
+
+    # The cycle is never changed in place (it is replaced when turned round), copies share it
+    _shared = BFS_Basic_Snake._shared + ('cycle', 'order')
+
+    def __init__(self, height, width, random_init=False, log: bool = False, debug: bool = False, seed: int = None):
+        super().__init__(height, width, random_init, log, debug, seed)
+        self.cycle, self.order = hamiltonian_cycle(width, height)
+
+    def plan_path(self):
+
+        size = self.board.size
+        head = self._ring[self._head_pos]
+
+        # A snake without body may go round the cycle either way, it turns the cycle round when the next cell is
+        # right behind it (a move back it may not make)
+        if self._length == 1 and not self.allow_reverse:
+            behind = self.board.neighbours[REVERSE_IDS[DIRECTION_IDS[self.direction]]][head]
+            if behind >= 0 and (self.order[behind] - self.order[head]) % size == 1:
+                self.cycle = self.cycle[:1] + self.cycle[:0:-1]
+                self.order = self.order[:]
+                for position, cell in enumerate(self.cycle):
+                    self.order[cell] = position
+
+        order = self.order
+        position = order[head]
+
+        # How far along the cycle the tail and the food are
+        # A snake without body is taken to have its tail on the cell behind the head: cutting onto that cell would
+        # leave the next cell of the cycle to be the old head (the tail) once it eats, a move back it may not make
+        tail = self._ring[(self._head_pos - self._length + 1) % self._capacity]
+        gap = (order[tail] - position) % size if self._length > 1 else size - 1
+        food = (order[self._food_cell] - position) % size if self._food_cell >= 0 else size
+        skip = -1 if self.allow_reverse else REVERSE_IDS[DIRECTION_IDS[self.direction]]
+
+        # The furthest move ahead not past the food, else the nearest one (the next cell of the cycle)
+        best, nearest = None, None
+        for direction_id, steps in enumerate(self.board.neighbours):
+            cell = steps[head]
+            if cell < 0 or direction_id == skip:
+                continue
+            ahead = (order[cell] - position) % size
+            if (ahead != 1 and ahead >= gap) or (self._grid[cell] and cell != tail):
+                continue
+            if ahead <= food and (best is None or ahead > best[0]):
+                best = (ahead, direction_id)
+            if nearest is None or ahead < nearest[0]:
+                nearest = (ahead, direction_id)
+
+        move = best or nearest
+        if move is None:
+            self.finder.path = {}
+            return
+
+        if self.debug:
+            logger.debug(f'Moving {move[0]} cells ahead along the cycle, the food is {food} and the tail {gap} cells ahead')
+        self.finder.path = {self.head: Direction.MOVES[move[1]]}
+
+    def __str__(self):
+        details = 'Hamiltonian Cycle Snake\n'
+
+        # Print snake's body
+        details += f'Initial Snake Head: {self.head}\n'
+        details += f'Initial Snake Direction: {self.direction}\n'
+
+        # Print food
+        details += f'Initial Food Place: {self.food}'
+
+        return details
+
+    __repr__ = __str__
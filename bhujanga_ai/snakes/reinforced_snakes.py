@@ -2,7 +2,6 @@
 from configparser import ConfigParser
 from collections import deque
 import numpy as np
-import random
 import os
 from datetime import datetime
 from typing import Tuple
@@ -17,9 +16,8 @@ from torch.optim import Adam
 
 # Import the necessary classes and helper functions
 from .basesnake import BaseSnake
-from bhujanga_ai.snakes.basesnake import DIRECTIONS
 from .utils import Q_Network_Basic, Q_Trainer_Basic
-from helper import Direction, BodyCollisionError, WallCollisionError, Point
+from helper import Direction, StepStatus, Point
 import logging
 
 from constants import MAX_MEMORY, BATCH_SIZE, LEARNING_RATE, DISCOUNT_RATE, EPSILON_MAX, EPSILON_MIN, EPSILON_DECAY, EPOCHS, HIDDEN_LAYER_SIZES, TARGET_UPDATE_FREQ
@@ -95,9 +93,10 @@ class DQN_Snake(BaseSnake):
         width: int,
         random_init: bool = False,
         log: bool = False,
-        debug: bool = False
+        debug: bool = False,
+        seed: int = None
     ) -> None:
-        super().__init__(height, width, random_init, log, debug)
+        super().__init__(height, width, random_init, log, debug, seed)
 
         self.games_played       = 0
         self.memory             = deque(maxlen=MAX_MEMORY)
@@ -128,68 +127,31 @@ class DQN_Snake(BaseSnake):
         # Loss Function
         self.loss_function = nn.MSELoss()
 
-    # Move the snake in given direction (Removed the reverse direction checking)
-    def move(self, direction : Direction) -> None:
-        """Move the snake in given direction"""
+    # Removed the reverse direction checking
+    allow_reverse = True
 
-        # Check if given direction is from Direction class
-        if not isinstance(direction, Point):
-            raise TypeError("Direction must be from Direction class")
-            # pass
+    # The hyperparameters are taken over by copies, the replay memory and the models are not
+    _settings = BaseSnake._settings + (
+        'games_played', 'learning_rate', 'discount_rate', 'epsilon', 'epsilon_min', 'epsilon_decay', 'epochs',
+        'hidden_layer_sizes', 'reward', 'target_update_freq',
+    )
 
-        # Check if the given direction is valid
-        if direction not in DIRECTIONS:
-            raise ValueError("Direction must be one of the following: UP, DOWN, LEFT, RIGHT")
-            # pass
+    # Move the snake in given direction [Added rewards]
+    def step(self, direction : Direction) -> tuple:
+        """Move the snake in given direction and return the `(status, reward)` of the step"""
 
-        # Update the snake's direction
-        self.direction = direction
+        status, self.reward = super().step(direction)
 
-        # Update the snake's head position
-        self.body.appendleft(self.head)
-        self.head = self.head + self.direction
-
-        # Check for any collisions (with walls, snake's body or food)
-        # Update the snake's body accordingly
-        self._check_collisions()
-
-    # Check for any collisions (with walls, snake's body or food) [Added rewards]
-    def _check_collisions(self) -> None:
-        """Check for any collisions (with walls, snake's body or food)"""
-
-        # Check if the snake's head is out of bounds
-        if self.head.x not in range(self.board_width) or self.head.y not in range(self.board_height):
-            self.reward = -10  # self.board_height * self.board_width
-            if self.logging:
+        if self.logging:
+            # Check if the snake's head is out of bounds
+            if status == StepStatus.WALL:
                 logger.info('Wall Collision')
-            raise WallCollisionError
-
-        # Check if the snake's head is on the food
-        if self.head == self.food:
-            # Place the food at random location on the board
-            self._place_food()
-            self.score += 1
-            self.reward = 10
-            self.tail = self.body.pop()
-            self.body.append(self.tail.copy())
-        else:
-            # Update the snake's body accordingly
-            # self.reward = -1 if self._distance_to_food_increased() else 2
-            self.reward = 0
-            self.body.pop()
-            if len(self.body) > 0:
-                self.tail = self.body.pop()
-                self.body.append(self.tail.copy())
-
-        # Check if the snake's head is on the snake's body
-        # We check this after updating the snake's body
-        # Otherwise it may wrongly detect the snake's head as on the snake's body
-        # Specifically the tail point
-        if self.head in self.body or self.head == self.tail:
-            if self.logging:
+
+            # Check if the snake's head is on the snake's body
+            elif status == StepStatus.BODY:
                 logger.info('Body Collision')
-            self.reward = -10
-            raise BodyCollisionError
+
+        return status, self.reward
 
     # Check for collision with walls, snake's body or food
     def _check_collision_for_point(self, point : Point) -> bool:
@@ -328,7 +290,7 @@ class DQN_Snake(BaseSnake):
             logger.info('Training Long Term Memory')
 
         if len(self.memory) > BATCH_SIZE:
-            sample = random.sample(self.memory, BATCH_SIZE)
+            sample = self.rng.sample(self.memory, BATCH_SIZE)
         else:
             sample = self.memory
 
@@ -366,8 +328,8 @@ class DQN_Snake(BaseSnake):
 
         action = [0, 0, 0]  # [straight, right, left]
 
-        if random.random() < self.epsilon:
-            idx = random.randint(0, 2)
+        if self.rng.random() < self.epsilon:
+            idx = self.rng.randint(0, 2)
         else:
             state0 = torch.tensor(state, dtype=torch.float)
             prediction = self.q_net(state0)
@@ -437,9 +399,10 @@ class Double_Q_Snake(DQN_Snake):
         width: int,
         random_init: bool = False,
         log: bool = False,
-        debug: bool = False
+        debug: bool = False,
+        seed: int = None
     ) -> None:
-        super().__init__(height, width, random_init, log, debug)
+        super().__init__(height, width, random_init, log, debug, seed)
 
         self.games_played       = 0
         self.memory             = deque(maxlen=MAX_MEMORY)
@@ -606,7 +569,7 @@ class Double_Q_Snake(DQN_Snake):
             logger.info('Training Long Term Memory')
 
         if len(self.memory) > BATCH_SIZE:
-            sample = random.sample(self.memory, BATCH_SIZE)
+            sample = self.rng.sample(self.memory, BATCH_SIZE)
         else:
             sample = self.memory
 
@@ -639,8 +602,8 @@ class Double_Q_Snake(DQN_Snake):
 
         action = [0, 0, 0]  # [straight, right, left]
 
-        if random.random() < self.epsilon:
-            idx = random.randint(0, 2)
+        if self.rng.random() < self.epsilon:
+            idx = self.rng.randint(0, 2)
         else:
             state0 = torch.tensor(state, dtype=torch.float)
             prediction = self.q_net(state0)
@@ -1,10 +1,15 @@
-from collections import deque
-from .basesnake import BaseSnake
+from array import array
+from collections import OrderedDict
+from heapq import heappush, heappop
+from functools import lru_cache
+from time import perf_counter
+from .basesnake import BaseSnake, DIRECTION_IDS, OPPOSITE
 from helper import Point, Direction
 import logging
 import os
+import json
 import configparser
-from copy import deepcopy
+from copy import copy
 import numpy as np
 from loguru import logger as lg
 
@@ -22,8 +27,18 @@ config.read(r'bhujanga_ai\settings.ini')
 
 
 # Required Constants
+# Direction id (in `Direction.MOVES`) of the reverse of every direction id
+REVERSE_IDS = tuple(DIRECTION_IDS[OPPOSITE[direction]] for direction in Direction.MOVES)
+
+# Ids of the two directions at right angles to every direction id
+SIDE_IDS = tuple(
+    tuple(side for side in range(len(Direction.MOVES)) if side not in (direction_id, REVERSE_IDS[direction_id]))
+    for direction_id in range(len(Direction.MOVES))
+)
+
 COMPLETE_MODEL_DIR = config['GAME - BASIC']['COMPLETE_MODEL_DIR']
 CHECKPOINT_DIR = config['GAME - BASIC']['CHECKPOINT_DIR']
+CYCLE_DIR = config['GAME - BASIC']['CYCLE_DIR']
 
 
 def Setup_Logging():
@@ -64,58 +79,90 @@ def Setup_Logging():
 logger = Setup_Logging()
 
 
+# Raised by a search running past the deadline of its finder
+class DeadlineExceeded(Exception):
+    pass
+
+
 # BASE CLASS FOR FINDERS
 class Finder:
+
+    # Number of cells expanded between two looks at the clock, when there is a deadline
+    # The clock is also read on the first cell, a plan runs many searches too short to reach the second look
+    DEADLINE_CHECK = 64
+
     def __init__(self, snake: BaseSnake, end: Point, log: bool = False, debug: bool = False):
         self.snake = snake
         self.start = snake.head
         self.end = end
         self.logging = log
         self.debug = debug
-        self.visited = []
+        self.expanded = 0  # Number of nodes expanded by the last search
         self.path = {}
 
+        # `perf_counter()` time past which the searches give up (None for no limit), and whether one did
+        self.deadline = None
+        self.expired = False
+
+    def check_deadline(self) -> None:
+        """Raise `DeadlineExceeded` if the deadline has passed"""
+        if self.deadline is not None and perf_counter() > self.deadline:
+            self.expired = True
+            raise DeadlineExceeded
+
     def find_path(self):
         # Will be overridden by child classes
         pass
 
-    def get_path_directions(self) -> list:
-        # sourcery skip: de-morgan, dict-comprehension, merge-else-if-into-elif, simplify-len-comparison, swap-if-else-branches, use-named-expression, while-guard-to-condition
+    def copy(self, snake: BaseSnake = None) -> 'Finder':
+        # Create a copy of the finder (optionally bound to another snake, e.g. a virtual one)
+        # Only the search results are copied, the snake is never deep copied
+        finder = copy(self)
+        finder.snake = self.snake if snake is None else snake
+        finder.path = self.path.copy()
+        return finder
 
-        # Starting from the end, backtrack the path
-        current = self.end
-        path = [current]
-        while current != self.start:
-            if current.parent is None:
-                break
-            current = current.parent
-            path.append(current)
+    def path_exists(self) -> bool:
+        return len(self.path) > 0 if self.path else False
 
-        if self.start not in path:
-            path.append(self.start)
-        if self.debug:
-            logger.debug(f"Path from {self.start} to {self.end}: {path[::-1]}")
 
-        # Convert path to list of directions
-        directions = {}
-        for i in range(len(path) - 1):
-            directions[path[i + 1]] = path[i] - path[i + 1]
+# Preallocated buffers of the array search engine
+class SearchBuffers:
+    """Flat buffers of the array search engine, shared by all the searches on boards of one size
 
-        # Check if path is empty
-        if len(directions) == 0:
-            if self.debug:
-                logger.debug('Path is empty')
-        else:
-            if self.debug:
-                logger.debug('Got directions')
-            self.path = directions
+    A cell is visited in the current search when `seen[cell] == stamp`, so starting a new search only bumps the stamp.
+    The searches are not reentrant: a search must be done with the buffers before the next one starts.
+    """
 
-    def copy(self) -> 'Finder':
-        # Create a deep copy of the finder
-        return deepcopy(self)
+    __slots__ = ('stamp', 'seen', 'parent', 'move', 'cost', 'queue', 'blocked', 'release', 'projection')
+
+    # Largest stamp of the `seen` array
+    MAX_STAMP = 2 ** 31 - 1
+
+    def __init__(self, size: int) -> None:
+        self.stamp = 0
+        self.seen = array('i', [0]) * size      # Stamp of the search which last visited the cell
+        self.parent = array('i', [0]) * size    # Cell from which the cell was reached
+        self.move = bytearray(size)             # Direction id (in `Direction.MOVES`) of the move into the cell
+        self.cost = array('i', [0]) * size      # Length of the best known path to the cell (A*)
+        self.queue = array('i', [0]) * size     # Every cell is queued at most once
+        self.blocked = bytearray(size)          # Blocked cell mask of the query
+        self.release = array('i', [0]) * size   # Step from which the cell is free (time aware search), kept clear
+        self.projection = bytearray(size)       # Blocked cells of a projected snake (see `find_tail_path`), kept clear
+
+    # Start a new search
+    def next_stamp(self) -> int:
+        if self.stamp == self.MAX_STAMP:
+            self.seen = array('i', [0]) * len(self.seen)
+            self.stamp = 0
+        self.stamp += 1
+        return self.stamp
 
-    def path_exists(self) -> bool:
-        return len(self.path) > 0 if self.path else False
+
+# One set of buffers per board size
+@lru_cache(maxsize=None)
+def search_buffers(size: int) -> SearchBuffers:
+    return SearchBuffers(size)
 
 
 # BREADTH FIRST SEARCH
@@ -123,95 +170,1387 @@ class BFS_Finder(Finder):
 
     def get_neighbors(self, current: Point, exclude_tail: bool = False) -> list:
 
-        # Board range
-        pos = current.copy()
-        x_range = range(self.snake.board_width)
-        y_range = range(self.snake.board_height)
-
-        # Get all neighbours
-        directions = [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT]
-        if current == self.snake.head:
-            neighbors = [pos + direction for direction in directions if direction != -self.snake.direction]
-        else:
-            neighbors = [pos + direction for direction in directions]
-
-        # Remove invalid neighbors
-        allowed_neighbors = deepcopy(neighbors)
-        for point in neighbors:
+        # Board tables (interned cells and neighbours) and the cells occupied by the snake (head included)
+        snake = self.snake
+        board = snake.board
+        grid = snake._grid
+        cell = board.cell(current)
 
-            #  Remove if out of bounds
-            if point.x not in x_range or point.y not in y_range or point == self.snake.head:
-                allowed_neighbors.remove(point)
+        # The tail moves away, so it is allowed when excluded
+        tail = board.cell(snake.tail) if exclude_tail and snake.tail is not None else -1
 
-            # Remove if it is in snakes body
-            elif exclude_tail:
-                body = deepcopy(self.snake.body)
-                body.pop()
-                if point in body:
-                    allowed_neighbors.remove(point)
+        # The snake cannot turn back from its head
+        skip = DIRECTION_IDS[OPPOSITE[snake.direction]] if current == snake.head else -1
 
-            elif point in self.snake.body:
-                allowed_neighbors.remove(point)
+        # Get all neighbours (cells off the board have index -1) which are not occupied by the snake
+        neighbors = []
+        for direction_id, steps in enumerate(board.neighbours):
+            neighbour = steps[cell]
+            if neighbour >= 0 and direction_id != skip and (not grid[neighbour] or neighbour == tail):
+                neighbors.append(board.cells[neighbour])
 
         # if self.debug:
-        #     logger.debug(f'Neighbor for point {current} : {allowed_neighbors}')
+        #     logger.debug(f'Neighbor for point {current} : {neighbors}')
+
+        return neighbors
 
-        return allowed_neighbors
+    def find_path(self, exclude_tail: bool = False, time_aware: bool = False) -> None:
+        """Find a shortest path from `start` to `end` around the snake
 
-    def find_path(self, exclude_tail: bool = False) -> None:
+        With `exclude_tail` the tail is passable, as it moves away in the same step.
+        With `time_aware` every body cell is passable once the snake has moved out of it (see `find_path_time_aware`),
+        the search must then start from the head.
+        """
 
         if self.debug:
             logger.debug('Starting BFS')
             logger.debug(f'Finding path from Start : {self.start} to End : {self.end}')
-            logger.debug(f'Excluding Tail : {exclude_tail}')
-            # logger.debug(f'Walls are : {list(self.snake.body)[:-1]}')
+            logger.debug(f'Excluding Tail : {exclude_tail}, Time Aware : {time_aware}')
+
+        snake = self.snake
+        board = snake.board
+        start, end = board.cell(self.start), board.cell(self.end)
+
+        # The snake cannot turn back from its head
+        skip = DIRECTION_IDS[OPPOSITE[snake.direction]] if self.start == snake.head else -1
+
+        if time_aware:
+            found = self.find_path_time_aware(start, end, skip)
+
+        # Build the blocked cell mask once for the query: the snake (head included), except the tail when excluded
+        else:
+            blocked = search_buffers(board.size).blocked
+            blocked[:] = snake._grid
+            if exclude_tail and snake.tail is not None:
+                blocked[board.cell(snake.tail)] = 0
+            found = self.find_path_with_mask(start, end, blocked, skip)
+
+        if found:
+            if self.debug:
+                logger.debug('Found path')
+        elif self.debug:
+            logger.debug('No path found')
+
+    def find_path_with_mask(self, start: int, end: int, blocked: bytearray, skip: int = -1) -> bool:
+        """Search engine: BFS over the cell indices from `start` to `end`, avoiding the `blocked` cells
+
+        `skip` is the id of a direction not taken from the start. The shortest path found is stored in `self.path`.
+        Returns whether a path was found.
+        """
+
+        board = self.snake.board
+        buffers = search_buffers(board.size)
+        stamp = buffers.next_stamp()
+        seen, parent, move, queue = buffers.seen, buffers.parent, buffers.move, buffers.queue
+        moves = tuple(enumerate(board.neighbours))
+        first_moves = tuple((direction_id, steps) for direction_id, steps in moves if direction_id != skip)
 
-        # Initialize the queue and visited list
-        self.queue = deque()
-        self.visited = []
         self.path = {}
 
         # Mark the start node as visited and enqueue it
-        self.queue.append(self.start)
+        seen[start] = stamp
+        queue[0] = start
+        read, write = 0, 1
+        found = False
+        deadline, check = self.deadline, self.DEADLINE_CHECK
 
-        # if self.debug:
-        #     logger.debug(f'Initial queue - {self.queue}')
-
-        while self.queue:
+        while read < write and not found:
 
             # Dequeue a vertex from queue
-            current: Point = self.queue.popleft()
-            # if self.debug:
-            #     logger.debug(f'Current point: ({current.x}, {current.y})')
+            current = queue[read]
+            read += 1
+            if deadline is not None and read % check == 1:
+                self.check_deadline()
+
+            # Visit the free neighbours (in the order of `Direction.MOVES`)
+            for direction_id, steps in (first_moves if current == start else moves):
+                neighbour = steps[current]
+                if neighbour < 0 or blocked[neighbour] or seen[neighbour] == stamp:
+                    continue
+
+                seen[neighbour] = stamp
+                parent[neighbour] = current
+                move[neighbour] = direction_id
+                queue[write] = neighbour
+                write += 1
+
+                if neighbour == end:
+                    found = True
+                    break
+
+        self.expanded = read
+        if not found:
+            return False
+
+        self._backtrack(start, end, buffers)
+        return True
+
+    def find_tail_path(self, body: list, direction: Direction) -> bool:
+        """Search from the head to the tail of a projected snake (see `BaseSnake.project_path`), the tail being passable
+
+        `body` are the cells of the snake from its head to its tail and `direction` its direction.
+        The blocked cells are only set for the body and cleared afterwards, so the query is O(body) besides the search.
+        """
+
+        board = self.snake.board
+        blocked = search_buffers(board.size).projection
+        head, tail = body[0], body[-1]
+        self.start, self.end = board.cells[head], board.cells[tail]
+        skip = -1 if self.snake.allow_reverse else DIRECTION_IDS[OPPOSITE[direction]]
+
+        for cell in body:
+            blocked[cell] = 1
+        blocked[tail] = 0
+        try:
+            return self.find_path_with_mask(head, tail, blocked, skip)
+        finally:
+            for cell in body:
+                blocked[cell] = 0
+
+    def find_longer_path(self) -> bool:
+        """Find a long path from `start` to `end` around the snake (the tail being passable) by stretching a shortest one
+
+        Walking along the shortest path, every step is replaced by a detour through the two free cells beside it
+        (a -> b becomes a -> a' -> b' -> b) for as long as such a pair exists, then the walk moves on.
+        The path is stored in `self.path` as usual, the snake is never copied. Returns whether a path was found.
+        Past the deadline of the finder the stretching stops early and `expired` is set.
+        """
 
-            # Get all adjacent vertices of the dequeued vertex
-            if current not in self.visited:
-                self.visited.append(current)
+        snake = self.snake
+        board = snake.board
+        buffers = search_buffers(board.size)
+        start, end = board.cell(self.start), board.cell(self.end)
+
+        # Same query as `find_path(exclude_tail=True)`
+        skip = DIRECTION_IDS[OPPOSITE[snake.direction]] if self.start == snake.head else -1
+        blocked = buffers.blocked
+        blocked[:] = snake._grid
+        if snake.tail is not None:
+            blocked[board.cell(snake.tail)] = 0
+        if not self.find_path_with_mask(start, end, blocked, skip):
+            return False
+
+        # The cells of the shortest path and the direction ids between them (read off the search buffers)
+        parent, move = buffers.parent, buffers.move
+        path, moves = [end], []
+        while path[-1] != start:
+            moves.append(move[path[-1]])
+            path.append(parent[path[-1]])
+        path.reverse()
+        moves.reverse()
+
+        # The cells on the path are marked with a fresh stamp, so a detour never crosses the path
+        used = buffers.seen
+        stamp = buffers.next_stamp()
+        for cell in path:
+            used[cell] = stamp
+
+        # Past the deadline the path is only stretched so far (it is a valid path at every point)
+        neighbours = board.neighbours
+        deadline = self.deadline
+        i = 0
+        while i < len(moves):
+            if deadline is not None and perf_counter() > deadline:
+                self.expired = True
+                break
+            a, b, direction_id = path[i], path[i + 1], moves[i]
+            for side in SIDE_IDS[direction_id]:
+                if i == 0 and side == skip:
+                    continue
+                a2, b2 = neighbours[side][a], neighbours[side][b]
+                if a2 < 0 or b2 < 0 or blocked[a2] or blocked[b2] or used[a2] == stamp or used[b2] == stamp:
+                    continue
+
+                # Take the detour, the new first step is tried again
+                path[i + 1:i + 1] = (a2, b2)
+                moves[i:i + 1] = (side, direction_id, REVERSE_IDS[side])
+                used[a2] = used[b2] = stamp
+                break
+            else:
+                i += 1
 
-                # Get neighbours from grid
-                # if self.debug:
-                #     logger.debug(f'Getting neighbors for point: {current}')
+        cells = board.cells
+        self.path = {cells[cell]: Direction.MOVES[direction_id] for cell, direction_id in zip(path, moves)}
 
-                for neighbour in self.get_neighbors(current, exclude_tail):
-                    neighbour: Point
-                    if neighbour not in self.visited:
-                        neighbour.parent = current
-                        self.queue.append(neighbour)
+        if self.debug:
+            logger.debug(f'Longer path from {self.start} to {self.end} with {len(self.path)} steps')
 
-                        if neighbour == self.end:
-                            self.end.parent = current
+        return True
 
-                            if self.debug:
-                                logger.debug('Found path')
+    def find_path_time_aware(self, start: int, end: int, skip: int = -1) -> bool:
+        """Search engine: BFS from the head where the body moves on while the search advances
 
-                            self.get_path_directions()
-                            return
+        The k-th segment counted from the tail (the tail being the 0-th) leaves its cell after k + 1 moves,
+        so a body cell is passable when it is reached at that step or later. The food is only passable as the end,
+        since eating it on the way would stop the body from moving on. Every cell is still visited once (at its
+        earliest arrival), so the path found is always valid but a path needing to come back later may be missed.
+        """
 
-            # if self.debug:
-            #     logger.debug(f'While loop running - Total visited - {len(self.visited)}')
+        snake = self.snake
+        board = snake.board
+        buffers = search_buffers(board.size)
+        release = buffers.release
+
+        # The step from which every body cell is free (0 for the free cells)
+        ring, capacity = snake._ring, snake._capacity
+        tail_pos = snake._head_pos - snake._length + 1
+        body = [ring[(tail_pos + k) % capacity] for k in range(snake._length)]
+        for k, cell in enumerate(body):
+            release[cell] = k + 1
+        food = snake._food_cell
+        if food >= 0 and food != end:
+            release[food] = board.size + 1
+
+        try:
+            stamp = buffers.next_stamp()
+            seen, parent, move, cost, queue = buffers.seen, buffers.parent, buffers.move, buffers.cost, buffers.queue
+            moves = tuple(enumerate(board.neighbours))
+            first_moves = tuple((direction_id, steps) for direction_id, steps in moves if direction_id != skip)
+
+            self.path = {}
+
+            seen[start] = stamp
+            cost[start] = 0
+            queue[0] = start
+            read, write = 0, 1
+            found = False
+            deadline, check = self.deadline, self.DEADLINE_CHECK
+
+            while read < write and not found:
+
+                # Dequeue a vertex from queue, its neighbours are reached one step later
+                current = queue[read]
+                read += 1
+                if deadline is not None and read % check == 1:
+                    self.check_deadline()
+                arrival = cost[current] + 1
+
+                for direction_id, steps in (first_moves if current == start else moves):
+                    neighbour = steps[current]
+                    if neighbour < 0 or seen[neighbour] == stamp or release[neighbour] > arrival:
+                        continue
+
+                    seen[neighbour] = stamp
+                    cost[neighbour] = arrival
+                    parent[neighbour] = current
+                    move[neighbour] = direction_id
+                    queue[write] = neighbour
+                    write += 1
+
+                    if neighbour == end:
+                        found = True
+                        break
+
+        # Leave the release buffer clear for the next query
+        finally:
+            for cell in body:
+                release[cell] = 0
+            if food >= 0:
+                release[food] = 0
+
+        self.expanded = read
+        if found:
+            self._backtrack(start, end, buffers)
+        return found
+
+    def _backtrack(self, start: int, end: int, buffers: SearchBuffers) -> None:
+
+        # Starting from the end, backtrack the path and convert it to directions
+        cells = self.snake.board.cells
+        parent, move = buffers.parent, buffers.move
+        current = end
+        while current != start:
+            previous = parent[current]
+            self.path[cells[previous]] = Direction.MOVES[move[current]]
+            current = previous
 
         if self.debug:
-            logger.debug('No path found')
+            logger.debug(f"Path from {self.start} to {self.end}: {list(self.path.items())[::-1]}")
+
+
+# A* SEARCH
+class AStar_Finder(BFS_Finder):
+    """A* search with the Manhattan distance to the end as heuristic
+
+    Same interface and `exclude_tail` semantics as `BFS_Finder`, only the search engine differs.
+    The heuristic is consistent on the grid, so the path found is a shortest one.
+    """
+
+    def find_path_with_mask(self, start: int, end: int, blocked: bytearray, skip: int = -1) -> bool:
+
+        board = self.snake.board
+        buffers = search_buffers(board.size)
+        stamp = buffers.next_stamp()
+        seen, parent, move, cost = buffers.seen, buffers.parent, buffers.move, buffers.cost
+        moves = tuple(enumerate(board.neighbours))
+        first_moves = tuple((direction_id, steps) for direction_id, steps in moves if direction_id != skip)
+
+        self.path = {}
+        self.expanded = 0
+
+        # The end may be off the board (e.g. no food), then there is no path
+        if end < 0:
+            return False
+        width = board.width
+        end_x, end_y = end % width, end // width
+
+        # Open list of (f, h, order, cell): lowest f first, ties go to the cell closest to the goal, then to the oldest
+        h = abs(start % width - end_x) + abs(start // width - end_y)
+        open_list = [(h, h, 0, start)]
+        seen[start] = stamp
+        cost[start] = 0
+        order = 1
+        deadline, check = self.deadline, self.DEADLINE_CHECK
+
+        while open_list:
+
+            f, h, _, current = heappop(open_list)
+            g = f - h
+
+            # Skip stale entries (the cell was reached by a shorter path since)
+            if g > cost[current]:
+                continue
+            self.expanded += 1
+            if deadline is not None and self.expanded % check == 1:
+                self.check_deadline()
+
+            for direction_id, steps in (first_moves if current == start else moves):
+                neighbour = steps[current]
+                if neighbour < 0 or blocked[neighbour] or (seen[neighbour] == stamp and cost[neighbour] <= g + 1):
+                    continue
+
+                seen[neighbour] = stamp
+                cost[neighbour] = g + 1
+                parent[neighbour] = current
+                move[neighbour] = direction_id
+
+                # The neighbours of the end have h = 1, so the end is reached through an optimal path when it is generated
+                if neighbour == end:
+                    self._backtrack(start, end, buffers)
+                    return True
+
+                h = abs(neighbour % width - end_x) + abs(neighbour // width - end_y)
+                heappush(open_list, (g + 1 + h, h, order, neighbour))
+                order += 1
+
+        return False
+
+
+# BIDIRECTIONAL BREADTH FIRST SEARCH
+class BiBFS_Finder(BFS_Finder):
+    """BFS expanding from both the start and the end until the two frontiers meet
+
+    Same interface and `exclude_tail` semantics as `BFS_Finder`. The smaller frontier is expanded one whole layer
+    at a time, and the shortest of the paths through the meeting points of that layer is kept.
+    """
+
+    def find_path_with_mask(self, start: int, end: int, blocked: bytearray, skip: int = -1) -> bool:
+
+        board = self.snake.board
+        buffers = search_buffers(board.size)
+        seen, parent, move, cost, queue = buffers.seen, buffers.parent, buffers.move, buffers.cost, buffers.queue
+        moves = tuple(enumerate(board.neighbours))
+        reverse = REVERSE_IDS
+
+        self.path = {}
+        self.expanded = 0
+
+        # The end must be a free cell on the board
+        if end < 0 or end == start or blocked[end]:
+            return False
+
+        # Every cell belongs to at most one side, marked by its stamp
+        # `parent` and `move` point towards the start for the forward side and towards the end for the backward side
+        forward, backward = buffers.next_stamp(), buffers.next_stamp()
+        seen[start], cost[start] = forward, 0
+        seen[end], cost[end] = backward, 0
+
+        # The forward frontier grows from the front of the queue, the backward one from its back
+        f_read, f_write = 0, 1
+        b_read, b_write = len(queue) - 1, len(queue) - 2
+        queue[f_read], queue[b_read] = start, end
+
+        best, meeting = -1, None
+        while meeting is None and f_read < f_write and b_read > b_write:
+            if self.deadline is not None:
+                self.check_deadline()
+
+            # Forward layer: the cells reachable from the start in one more step
+            if f_write - f_read <= b_read - b_write:
+                layer_end = f_write
+                while f_read < layer_end:
+                    current = queue[f_read]
+                    f_read += 1
+                    for direction_id, steps in moves:
+                        neighbour = steps[current]
+                        if neighbour < 0 or blocked[neighbour] or (current == start and direction_id == skip):
+                            continue
+                        if seen[neighbour] == backward:
+                            length = cost[current] + 1 + cost[neighbour]
+                            if meeting is None or length < best:
+                                best, meeting = length, (current, neighbour, direction_id)
+                        elif seen[neighbour] != forward:
+                            seen[neighbour] = forward
+                            parent[neighbour] = current
+                            move[neighbour] = direction_id
+                            cost[neighbour] = cost[current] + 1
+                            queue[f_write] = neighbour
+                            f_write += 1
+
+            # Backward layer: the cells from which the end is reachable in one more step
+            else:
+                layer_end = b_write
+                while b_read > layer_end:
+                    current = queue[b_read]
+                    b_read -= 1
+                    for direction_id, steps in moves:
+                        neighbour = steps[current]
+                        if neighbour < 0 or (neighbour == start and reverse[direction_id] == skip):
+                            continue
+                        if seen[neighbour] == forward:
+                            length = cost[neighbour] + 1 + cost[current]
+                            if meeting is None or length < best:
+                                best, meeting = length, (neighbour, current, reverse[direction_id])
+                        elif seen[neighbour] != backward and not blocked[neighbour]:
+                            seen[neighbour] = backward
+                            parent[neighbour] = current
+                            move[neighbour] = reverse[direction_id]
+                            cost[neighbour] = cost[current] + 1
+                            queue[b_write] = neighbour
+                            b_write -= 1
+
+        self.expanded = f_read + len(queue) - 1 - b_read
+        if meeting is None:
+            return False
+
+        # Join the forward half (backtracked to the start), the meeting step and the backward half (followed to the end)
+        cells = board.cells
+        last, first, direction_id = meeting
+        current = last
+        while current != start:
+            previous = parent[current]
+            self.path[cells[previous]] = Direction.MOVES[move[current]]
+            current = previous
+
+        self.path[cells[last]] = Direction.MOVES[direction_id]
+        current = first
+        while current != end:
+            self.path[cells[current]] = Direction.MOVES[move[current]]
+            current = parent[current]
+
+        if self.debug:
+            logger.debug(f"Path from {self.start} to {self.end}: {self.path}")
+
+        return True
+
+
+# INCREMENTAL REPLANNING (D* LITE)
+class DStarLite_Finder(BFS_Finder):
+    """D* Lite: searches backwards from the end and keeps its search between calls
+
+    The finder watches the snake (see `BaseSnake.add_watcher`). After a move only the cells which changed
+    (the neck becoming part of the body, the released tail) and the cells whose distance depends on them are
+    searched again, the rest of the search is reused. The search starts over when the end or the food changes.
+
+    Only the plain search from the head is incremental, `exclude_tail`, `time_aware` and searches from other
+    cells run the BFS engine of `BFS_Finder`.
+    """
+
+    UNREACHABLE = 2 ** 30
+
+    def __init__(self, snake: BaseSnake, end: Point, log: bool = False, debug: bool = False):
+        super().__init__(snake, end, log, debug)
+        size = snake.board.size
+
+        # g is the distance to the end, rhs its one step lookahead (they differ for the cells to search again)
+        self.g = array('i', [self.UNREACHABLE]) * size
+        self.rhs = array('i', [self.UNREACHABLE]) * size
+        self._unreachable = self.g[:]
+        self.blocked = bytearray(size)  # The snake's body (the head excluded)
+
+        self.head = -1      # Head of the snake (tracked through the watcher events)
+        self.goal = -1      # End the search was made for
+        self.last = -1      # Head when the search was last brought up to date
+        self.km = 0         # Sum of the heuristic shifts of the head since the search started
+        self.open_list = []
+        self.open_keys = {}
+        self.changed = set()
+        self.stale = True
+
+        snake.add_watcher(self)
+
+    # Stop following the snake
+    def close(self) -> None:
+        self.snake.remove_watcher(self)
+
+    # Copies (e.g. for virtual snakes) are plain BFS finders, the incremental search follows the original snake only
+    def copy(self, snake: BaseSnake = None) -> BFS_Finder:
+        finder = BFS_Finder(self.snake if snake is None else snake, self.end, self.logging, self.debug)
+        finder.start = self.start
+        finder.path = self.path.copy()
+        return finder
+
+    # Watcher events (see `BaseSnake.add_watcher`)
+    def cell_blocked(self, cell: int) -> None:
+        previous, self.head = self.head, cell
+        self.changed.add(previous)
+
+    def cell_released(self, cell: int) -> None:
+        self.changed.add(cell)
+
+    def food_changed(self, cell: int) -> None:
+        self.stale = True
+
+    def snake_reset(self) -> None:
+        self.stale = True
+
+    def find_path(self, exclude_tail: bool = False, time_aware: bool = False) -> None:
+
+        snake = self.snake
+        board = snake.board
+        if exclude_tail or time_aware or self.start != snake.head:
+            return super().find_path(exclude_tail, time_aware)
+
+        if self.debug:
+            logger.debug('Starting D* Lite')
+            logger.debug(f'Finding path from Start : {self.start} to End : {self.end}')
+
+        self.path = {}
+        self.expanded = 0
+
+        goal = board.cell(self.end)
+        if goal < 0:
+            return
+        if self.stale or goal != self.goal:
+            self._initialize(goal)
+        else:
+            self._apply_changes()
+
+        self._compute_shortest_path()
+        self._extract_path()
+
+        if self.debug:
+            logger.debug('Found path' if self.path else 'No path found')
+
+    # Start a new search towards the goal
+    def _initialize(self, goal: int) -> None:
+        snake = self.snake
+        self.g[:] = self._unreachable
+        self.rhs[:] = self._unreachable
+        self.head = self.last = snake._ring[snake._head_pos]
+        self.blocked[:] = snake._grid
+        self.blocked[self.head] = 0
+        self.goal = goal
+        self.km = 0
+        self.open_list = []
+        self.open_keys = {}
+        self.changed.clear()
+        self.stale = False
+
+        self.rhs[goal] = 0
+        self._push(goal)
+
+    # Account for the moves made since the last search
+    def _apply_changes(self) -> None:
+
+        # The heuristic is measured from the head, every key in the open list is shifted by how far it moved
+        if self.head != self.last:
+            self.km += self._heuristic(self.last, self.head)
+            self.last = self.head
+
+        grid, blocked, neighbours = self.snake._grid, self.blocked, self.snake.board.neighbours
+        for cell in self.changed:
+            now = 1 if grid[cell] and cell != self.head else 0
+            if now != blocked[cell]:
+                blocked[cell] = now
+                self._update_vertex(cell)
+                for steps in neighbours:
+                    if steps[cell] >= 0:
+                        self._update_vertex(steps[cell])
+        self.changed.clear()
+
+    def _heuristic(self, a: int, b: int) -> int:
+        width = self.snake.board.width
+        return abs(a % width - b % width) + abs(a // width - b // width)
+
+    def _key(self, cell: int) -> tuple:
+        distance = min(self.g[cell], self.rhs[cell])
+        return (distance + self._heuristic(self.head, cell) + self.km, distance)
+
+    def _push(self, cell: int) -> None:
+        key = self._key(cell)
+        self.open_keys[cell] = key
+        heappush(self.open_list, (key, cell))
+
+    def _update_vertex(self, cell: int) -> None:
+        g, rhs, blocked = self.g, self.rhs, self.blocked
+        if cell != self.goal:
+            best = self.UNREACHABLE
+            if not blocked[cell]:
+                for steps in self.snake.board.neighbours:
+                    neighbour = steps[cell]
+                    if neighbour >= 0 and not blocked[neighbour] and g[neighbour] < best:
+                        best = g[neighbour]
+            rhs[cell] = best + 1 if best < self.UNREACHABLE else self.UNREACHABLE
+
+        self.open_keys.pop(cell, None)
+        if g[cell] != rhs[cell]:
+            self._push(cell)
+
+    def _compute_shortest_path(self) -> None:
+
+        g, rhs, blocked = self.g, self.rhs, self.blocked
+        open_list, open_keys = self.open_list, self.open_keys
+        neighbours = self.snake.board.neighbours
+        start = self.head
+
+        while open_list:
+            key, cell = open_list[0]
+
+            # Skip the entries of cells removed from the open list or queued again with another key
+            if open_keys.get(cell) != key:
+                heappop(open_list)
+                continue
+            if key >= self._key(start) and rhs[start] == g[start]:
+                break
+
+            heappop(open_list)
+            self.expanded += 1
+            new_key = self._key(cell)
+            if key < new_key:
+                open_keys[cell] = new_key
+                heappush(open_list, (new_key, cell))
+                continue
+
+            del open_keys[cell]
+            if g[cell] > rhs[cell]:
+                g[cell] = rhs[cell]
+            else:
+                g[cell] = self.UNREACHABLE
+                self._update_vertex(cell)
+            for steps in neighbours:
+                neighbour = steps[cell]
+                if neighbour >= 0 and not blocked[neighbour]:
+                    self._update_vertex(neighbour)
+
+    # Follow the smallest distances from the head to the goal
+    def _extract_path(self) -> None:
+
+        snake = self.snake
+        board = snake.board
+        g, blocked = self.g, self.blocked
+        current = self.head
+        if g[current] >= self.UNREACHABLE:
+            return
+
+        # The first move cannot turn the snake back (only possible when it has no body)
+        skip = -1 if snake.allow_reverse else DIRECTION_IDS[OPPOSITE[snake.direction]]
+
+        path = {}
+        while current != self.goal:
+            first = -1
+            for direction_id, steps in enumerate(board.neighbours):
+                neighbour = steps[current]
+                if neighbour >= 0 and not blocked[neighbour] and g[neighbour] == g[current] - 1 and direction_id != skip:
+                    first = direction_id
+                    break
+
+            # Only the reverse move is on a shortest path, leave it to the BFS engine to find another one
+            if first < 0:
+                return super().find_path()
+
+            path[board.cells[current]] = Direction.MOVES[first]
+            current = board.neighbours[first][current]
+            skip = -1
+
+        self.path = path
+
+
+# DISTANCE FIELD TOWARDS THE FOOD
+class FoodDistanceField:
+    """Distance from every cell to the food through the free cells, kept up to date as the snake moves
+
+    `dist[cell]` is the length of the shortest path from the cell to the food (`UNREACHABLE` if there is none) and
+    `toward[cell]` the lowest id (in `Direction.MOVES`) of the first move of such a path (-1 at the food or if unreachable).
+    The snake's body blocks the paths, its head does not, so both answer for the head with a single lookup.
+
+    The field is rebuilt by a BFS from the food when the food is placed and repaired incrementally otherwise:
+    a released tail can only shorten distances, a blocked neck only lengthens the distances of the cells whose
+    shortest paths all went through it. The changes are queued as the snake moves and applied when the field is
+    read next, if too many piled up since then the field is rebuilt instead.
+    """
+
+    UNREACHABLE = 2 ** 30
+
+    # Largest number of queued changes repaired incrementally (a rebuild is cheaper beyond it)
+    MAX_PENDING = 16
+
+    def __init__(self, snake: BaseSnake) -> None:
+        self.snake = snake
+        self.board = snake.board
+        size = self.board.size
+
+        self._dist = array('i', [self.UNREACHABLE]) * size
+        self._toward = array('b', [-1]) * size
+        self._unreachable = self._dist[:]
+        self._nowhere = self._toward[:]
+        self.blocked = bytearray(size)  # The snake's body (the head excluded)
+        self.head = -1
+        self.food = -1
+
+        # Changes not applied yet: (blocked, cell) in the order they happened
+        self._pending = []
+        self._stale = True
+
+        # Scratch buffers of the repairs
+        self._stamp = 0
+        self._marks = array('i', [0]) * size
+
+        # Counters (full rebuilds and incremental repairs)
+        self.rebuilds = 0
+        self.repairs = 0
+
+        snake.add_watcher(self)
+
+    # Stop following the snake
+    def close(self) -> None:
+        self.snake.remove_watcher(self)
+
+    # The arrays, brought up to date
+    @property
+    def dist(self) -> array:
+        self.sync()
+        return self._dist
+
+    @property
+    def toward(self) -> array:
+        self.sync()
+        return self._toward
+
+    # Watcher events (see `BaseSnake.add_watcher`)
+    def cell_blocked(self, cell: int) -> None:
+
+        # The head moved into the cell, the previous head (if the snake did not leave it) is now part of the body
+        previous, self.head = self.head, cell
+        if previous != cell and self.snake._grid[previous]:
+            self._queue(1, previous)
+
+    def cell_released(self, cell: int) -> None:
+
+        # The head of a snake without body leaves its cell, which was passable already
+        if cell != self.head:
+            self._queue(0, cell)
+
+    def food_changed(self, cell: int) -> None:
+        self._stale = True
+
+    def snake_reset(self) -> None:
+        self._stale = True
+
+    def _queue(self, blocked: int, cell: int) -> None:
+        if self._stale:
+            return
+        if len(self._pending) == self.MAX_PENDING:
+            self._stale = True
+            self._pending.clear()
+            return
+        self._pending.append((blocked, cell))
+
+    # Apply the queued changes
+    def sync(self) -> None:
+        if self._stale:
+            self.rebuild()
+        elif self._pending:
+            for blocked, cell in self._pending:
+                if blocked:
+                    self._block(cell)
+                else:
+                    self._release(cell)
+            self._pending.clear()
+
+    # Compute the whole field with a BFS from the food
+    def rebuild(self) -> None:
+
+        snake = self.snake
+        neighbours = self.board.neighbours
+        dist, toward, blocked = self._dist, self._toward, self.blocked
+
+        self.head = snake._ring[snake._head_pos]
+        self.food = snake._food_cell
+        blocked[:] = snake._grid
+        blocked[self.head] = 0
+        dist[:] = self._unreachable
+        toward[:] = self._nowhere
+        self._pending.clear()
+        self._stale = False
+        self.rebuilds += 1
+
+        if self.food < 0:
+            return
+
+        dist[self.food] = 0
+        queue = [self.food]
+        for current in queue:
+            distance = dist[current] + 1
+            for steps in neighbours:
+                neighbour = steps[current]
+                if neighbour >= 0 and not blocked[neighbour] and dist[neighbour] > distance:
+                    dist[neighbour] = distance
+                    queue.append(neighbour)
+
+        self._set_toward(queue)
+
+    # A cell became passable: spread the shorter distances from it
+    def _release(self, cell: int) -> None:
+
+        neighbours = self.board.neighbours
+        dist, blocked = self._dist, self.blocked
+        blocked[cell] = 0
+        self.repairs += 1
+
+        best = min((dist[steps[cell]] for steps in neighbours if steps[cell] >= 0), default=self.UNREACHABLE)
+        if best >= self.UNREACHABLE:
+            return
+        dist[cell] = best + 1
+
+        queue = [cell]
+        for current in queue:
+            for steps in neighbours:
+                neighbour = steps[current]
+                if neighbour >= 0 and not blocked[neighbour] and dist[current] + 1 < dist[neighbour]:
+                    dist[neighbour] = dist[current] + 1
+                    queue.append(neighbour)
+
+        self._refresh_toward(queue)
+
+    # A cell became blocked: find the cells which lost all their shortest paths and compute their distances again
+    def _block(self, cell: int) -> None:
+
+        neighbours = self.board.neighbours
+        dist, blocked, marks = self._dist, self.blocked, self._marks
+        unreachable = self.UNREACHABLE
+        blocked[cell] = 1
+        self.repairs += 1
+
+        old = dist[cell]
+        dist[cell] = unreachable
+        if old >= unreachable:
+            self._toward[cell] = -1
+            return
+
+        # Cells are examined level by level (by their old distance), a cell is affected
+        # when none of its neighbours one level below is still a valid support
+        self._stamp += 1
+        queued, affected = self._stamp, -self._stamp
+        queue = [steps[cell] for steps in neighbours if steps[cell] >= 0 and not blocked[steps[cell]] and dist[steps[cell]] == old + 1]
+        for candidate in queue:
+            marks[candidate] = queued
+
+        lost = []
+        for current in queue:
+            level = dist[current]
+            supported = False
+            for steps in neighbours:
+                neighbour = steps[current]
+                if neighbour >= 0 and not blocked[neighbour] and dist[neighbour] == level - 1 and marks[neighbour] != affected:
+                    supported = True
+                    break
+            if supported:
+                continue
+
+            marks[current] = affected
+            lost.append(current)
+            for steps in neighbours:
+                neighbour = steps[current]
+                if neighbour >= 0 and not blocked[neighbour] and dist[neighbour] == level + 1 and marks[neighbour] != queued:
+                    marks[neighbour] = queued
+                    queue.append(neighbour)
+
+        # Distances of the affected cells from their unaffected neighbours, then spread among themselves
+        for current in lost:
+            dist[current] = unreachable
+        heap = []
+        for current in lost:
+            best = min((dist[steps[current]] for steps in neighbours if steps[current] >= 0 and marks[steps[current]] != affected), default=unreachable)
+            if best < unreachable:
+                dist[current] = best + 1
+                heappush(heap, (best + 1, current))
+
+        while heap:
+            distance, current = heappop(heap)
+            if distance > dist[current]:
+                continue
+            for steps in neighbours:
+                neighbour = steps[current]
+                if neighbour >= 0 and marks[neighbour] == affected and distance + 1 < dist[neighbour]:
+                    dist[neighbour] = distance + 1
+                    heappush(heap, (distance + 1, neighbour))
+
+        self._refresh_toward(lost + [cell])
+
+    # Recompute the first move of the given cells and of their neighbours
+    def _refresh_toward(self, cells: list) -> None:
+
+        touched = set(cells)
+        for steps in self.board.neighbours:
+            touched.update(steps[cell] for cell in cells)
+        touched.discard(-1)
+        self._set_toward(touched)
+
+    # The first move of a cell is its lowest direction id one step closer to the food, which only depends on the
+    # distances: a repaired field moves the same way as one rebuilt on the same board
+    def _set_toward(self, cells) -> None:
+
+        dist, toward, unreachable = self._dist, self._toward, self.UNREACHABLE
+        moves = tuple(enumerate(self.board.neighbours))
+
+        for cell in cells:
+            first = -1
+            distance = dist[cell]
+            if 0 < distance < unreachable:
+                for direction_id, steps in moves:
+                    neighbour = steps[cell]
+                    if neighbour >= 0 and dist[neighbour] == distance - 1:
+                        first = direction_id
+                        break
+            toward[cell] = first
+
+    # Queries
+    def distance(self, point: Point) -> int:
+        """Length of the shortest path from the point to the food (None if there is none)"""
+        distance = self.dist[self.board.cell(point)]
+        return distance if distance < self.UNREACHABLE else None
+
+    def path(self) -> dict:
+        """Shortest path from the head to the food, in the format of `Finder.path` (empty if there is none)"""
+
+        snake = self.snake
+        neighbours = self.board.neighbours
+        dist, toward = self.dist, self.toward
+        head = self.head
+        if dist[head] >= self.UNREACHABLE or head == self.food:
+            return {}
+
+        # The first move cannot turn the snake back (only possible when it has no body)
+        first = toward[head]
+        if not snake.allow_reverse and Direction.MOVES[first] == OPPOSITE[snake.direction]:
+            first = next((
+                direction_id for direction_id, steps in enumerate(neighbours)
+                if direction_id != first and steps[head] >= 0 and dist[steps[head]] == dist[head] - 1
+            ), -1)
+            if first < 0:
+                return {}
+
+        cells = self.board.cells
+        path = {cells[head]: Direction.MOVES[first]}
+        current = neighbours[first][head]
+        while current != self.food:
+            path[cells[current]] = Direction.MOVES[toward[current]]
+            current = neighbours[toward[current]][current]
+        return path
+
+
+# Regions of the free cells, kept up to date as the snake moves
+class SafetyMap:
+    """Sizes of the connected regions of the free cells (union-find), kept up to date as the snake moves
+
+    Every free cell (the food included) is a node of a union-find, the snake's cells are not. A released tail gets
+    a new node merged with its free neighbours. A cell taken by the head is dropped from its region, which only
+    shrinks by one when the free cells around it stay connected within its 3x3 window (the cell is not a cut point).
+    Otherwise the region may have split: a search is run from every side at once until all but one ran out, the
+    cells of those get a region of their own. The regions are rebuilt when the nodes run out or the snake is reset.
+    """
+
+    def __init__(self, snake: BaseSnake) -> None:
+        self.snake = snake
+        self.board = snake.board
+        size = self.board.size
+
+        # Node of every free cell (-1 for the snake's cells), the nodes are only reused after a rebuild
+        self._node = array('i', [-1]) * size
+        self._no_nodes = self._node[:]
+        self._parent = array('i', [0]) * (2 * size)
+        self._size = array('i', [0]) * (2 * size)
+        self._nodes = 0
+        self._stale = True
+
+        # Marks of the searches after a cut (the search id added to a stamp)
+        self._marks = array('i', [0]) * size
+        self._stamp = 1
+
+        # The 8 cells around every cell, clockwise from the one above (-1 off the board)
+        neighbours = self.board.neighbours
+        up, down, left, right = (neighbours[DIRECTION_IDS[direction]] for direction in (Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT))
+        self._window = (
+            up, tuple(right[cell] if cell >= 0 else -1 for cell in up),
+            right, tuple(right[cell] if cell >= 0 else -1 for cell in down),
+            down, tuple(left[cell] if cell >= 0 else -1 for cell in down),
+            left, tuple(left[cell] if cell >= 0 else -1 for cell in up),
+        )
+
+        # Counter of full rebuilds
+        self.rebuilds = 0
+
+        snake.add_watcher(self)
+
+    # Stop following the snake
+    def close(self) -> None:
+        self.snake.remove_watcher(self)
+
+    # Watcher events (see `BaseSnake.add_watcher`)
+    def cell_released(self, cell: int) -> None:
+        if self._stale:
+            return
+        if self._nodes == len(self._parent):
+            self._stale = True
+            return
+        self._add(cell)
+
+    def cell_blocked(self, cell: int) -> None:
+        if self._stale:
+            return
+
+        node = self._node[cell]
+        if node < 0:
+            self._stale = True
+            return
+
+        self._node[cell] = -1
+        self._size[self._find(node)] -= 1
+        sides = self._sides(cell)
+        if len(sides) > 1:
+            self._split(sides)
+
+    def food_changed(self, cell: int) -> None:
+        # The food cell is free either way
+        pass
+
+    def snake_reset(self) -> None:
+        self._stale = True
+
+    # Union-find (union by size, path halving)
+    def _find(self, node: int) -> int:
+        parent = self._parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _union(self, a: int, b: int) -> None:
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return
+        if self._size[a] < self._size[b]:
+            a, b = b, a
+        self._parent[b] = a
+        self._size[a] += self._size[b]
+
+    # Add a free cell as a new node joined to its free neighbours
+    def _add(self, cell: int) -> None:
+        node = self._nodes
+        self._nodes += 1
+        self._node[cell] = node
+        self._parent[node] = node
+        self._size[node] = 1
+        for steps in self.board.neighbours:
+            neighbour = steps[cell]
+            if neighbour >= 0 and self._node[neighbour] >= 0:
+                self._union(node, self._node[neighbour])
+
+    # One free neighbour of the cell for every group of them still connected around it, looking at its 3x3 window only
+    def _sides(self, cell: int) -> list:
+
+        node = self._node
+        window = [around[cell] for around in self._window]
+        free = [around >= 0 and node[around] >= 0 for around in window]
+        if all(free):
+            return [window[0]]
+
+        # The runs of free cells around the cell (consecutive ones are adjacent) holding a neighbour of it,
+        # the neighbours sit at the even places of the window
+        start = free.index(False)
+        sides, side = [], -1
+        for k in range(1, len(free) + 1):
+            place = (start + k) % len(free)
+            if not free[place]:
+                if side >= 0:
+                    sides.append(side)
+                side = -1
+            elif place % 2 == 0 and side < 0:
+                side = window[place]
+        return sides
+
+    # The region of the given cells may have split: search from all of them at once
+    def _split(self, sides: list) -> None:
+
+        node, marks, neighbours = self._node, self._marks, self.board.neighbours
+        root = self._find(node[sides[0]])
+        if self._nodes + len(sides) > len(self._parent):
+            self._stale = True
+            return
+
+        # Every search marks its cells with its id, searches meeting are merged (the leader keeps the cells)
+        base = self._stamp
+        self._stamp += len(sides)
+        leader = list(range(len(sides)))
+        cells = [[side] for side in sides]
+        reads = [0] * len(sides)
+        for search, side in enumerate(sides):
+            marks[side] = base + search
+
+        running = list(range(len(sides)))
+        while len(running) > 1:
+            for search in running[:]:
+                if leader[search] != search:
+                    continue
+                members = cells[search]
+                if reads[search] == len(members):
+                    running.remove(search)
+                    continue
+
+                current = members[reads[search]]
+                reads[search] += 1
+                for steps in neighbours:
+                    neighbour = steps[current]
+                    if neighbour < 0 or node[neighbour] < 0:
+                        continue
+                    if marks[neighbour] < base:
+                        marks[neighbour] = base + search
+                        members.append(neighbour)
+                        continue
+
+                    other = marks[neighbour] - base
+                    while leader[other] != other:
+                        other = leader[other]
+                    if other != search:
+                        # Both searches are in the same region: the cells searched from go first
+                        leader[other] = search
+                        members[reads[search]:reads[search]] = cells[other][:reads[other]]
+                        reads[search] += reads[other]
+                        members.extend(cells[other][reads[other]:])
+                        cells[other] = None
+                        running.remove(other)
+
+        # The searches which ran out found regions of their own (the largest keeps the old one if all ran out)
+        done = [search for search in range(len(sides)) if leader[search] == search and search not in running]
+        if not running:
+            done.remove(max(done, key=lambda search: len(cells[search])))
+        for search in done:
+            region = self._nodes
+            self._nodes += 1
+            self._parent[region] = region
+            self._size[region] = len(cells[search])
+            self._size[root] -= len(cells[search])
+            for cell in cells[search]:
+                node[cell] = region
+
+    # Compute all the regions again
+    def rebuild(self) -> None:
+
+        snake = self.snake
+        node = self._node
+        node[:] = self._no_nodes
+        self._nodes = 0
+        self._stale = False
+        self.rebuilds += 1
+
+        for cell in snake._free[:snake._free_count]:
+            self._add(cell)
+
+    def sync(self) -> None:
+        if self._stale:
+            self.rebuild()
+
+    # Queries
+    def region_size(self, point: Point) -> int:
+        """Number of free cells reachable from the point (0 if it is not free)"""
+        self.sync()
+        node = self._node[self.board.cell(point)]
+        return self._size[self._find(node)] if node >= 0 else 0
+
+    def is_safe(self, point: Point) -> bool:
+        """Whether the head can move into the point without being shut in a region too small for the snake
+
+        True if the point is the tail, or its region borders the tail or has room for the whole snake.
+        Only the free cells count, so a region which would open up as the body moves on may still be rejected.
+        """
+
+        self.sync()
+        snake = self.snake
+        cell = self.board.cell(point)
+        tail = snake._ring[(snake._head_pos - snake._length + 1) % snake._capacity]
+        if cell == tail and snake._length > 1:
+            return True
+
+        node = self._node[cell]
+        if node < 0:
+            return False
+        root = self._find(node)
+        if self._size[root] >= snake._length:
+            return True
+
+        # The snake can keep following its tail
+        for steps in self.board.neighbours:
+            neighbour = steps[tail]
+            if neighbour >= 0 and self._node[neighbour] >= 0 and self._find(self._node[neighbour]) == root:
+                return True
+        return False
+
+    def move_regions(self) -> dict:
+        """Size of the region of every move of the head into a free cell"""
+
+        self.sync()
+        snake = self.snake
+        neighbours = self.board.neighbours
+        head = snake._ring[snake._head_pos]
+        regions = {}
+        for direction in Direction.MOVES:
+            if not snake.allow_reverse and direction == OPPOSITE[snake.direction]:
+                continue
+            cell = neighbours[DIRECTION_IDS[direction]][head]
+            if cell >= 0 and self._node[cell] >= 0:
+                regions[direction] = self._size[self._find(self._node[cell])]
+        return regions
+
+
+# Plans already made, by the state they were made in
+class TranspositionCache:
+    """LRU cache of plans keyed on the state of the snake (e.g. its zobrist hash), holding at most `max_bytes` of plans
+
+    Planning is deterministic, so a state seen before (later in a looping game, or again in a game replayed with
+    the same seed) gets the plan made back then. The least recently used plans are dropped beyond `max_bytes`.
+
+    The size of a plan is estimated as `ENTRY_BYTES` plus `STEP_BYTES` per step of its path: the key tuple, the
+    zobrist int and the slot of the dict for the entry, a (Point, Direction) pair and its slot in the plan tuple for
+    a step (the Points and Directions themselves are shared with the snake). Measured with `tracemalloc` over the
+    games of the look ahead snake on 10x10 to 30x30 boards, an entry costs about 220 bytes and a step about 66.
+    """
+
+    ENTRY_BYTES = 224
+    STEP_BYTES = 64
+    MAX_BYTES = 8 * 1024 * 1024
+
+    def __init__(self, max_bytes: int = MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+
+        # Counters (lookups found, lookups missed and plans dropped)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Estimated memory of a stored plan (see the class docstring)
+    def entry_bytes(self, plan) -> int:
+        return self.ENTRY_BYTES + self.STEP_BYTES * len(plan)
+
+    def get(self, key):
+        """The plan stored for the key (None if there is none), which becomes the most recently used"""
+        plan = self._entries.get(key)
+        if plan is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return plan
+
+    def put(self, key, plan) -> None:
+        """Store the plan for the key, dropping the least recently used plans beyond `max_bytes`"""
+        old = self._entries.get(key)
+        if old is not None:
+            self.bytes -= self.entry_bytes(old)
+        self._entries[key] = plan
+        self._entries.move_to_end(key)
+        self.bytes += self.entry_bytes(plan)
+        while self.bytes > self.max_bytes and self._entries:
+            _, dropped = self._entries.popitem(last=False)
+            self.bytes -= self.entry_bytes(dropped)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Hamiltonian cycle of the board (the cells in the order they are visited)
+def build_hamiltonian_cycle(width: int, height: int) -> list:
+    """Zigzag through the rows leaving out the first column, which leads back to the start
+
+    With an odd number of rows the board is walked the other way round (through the columns).
+    There is no Hamiltonian cycle when both sides are odd (or a side is shorter than 2), a `ValueError` is raised.
+    """
+
+    if width < 2 or height < 2 or (width % 2 and height % 2):
+        raise ValueError(f'There is no Hamiltonian cycle on a {width}x{height} board')
+
+    # Walk the transposed board and map the cells back
+    if height % 2:
+        return [(cell % height) * width + cell // height for cell in build_hamiltonian_cycle(height, width)]
+
+    # The first row, the zigzag over the other columns and back up the first column
+    cycle = list(range(width))
+    for y in range(1, height):
+        xs = range(width - 1, 0, -1) if y % 2 else range(1, width)
+        cycle.extend(y * width + x for x in xs)
+    cycle.extend(y * width for y in range(height - 1, 0, -1))
+    return cycle
+
+
+def is_hamiltonian_cycle(cycle: list, width: int, height: int) -> bool:
+    # Every cell once, every cell next to the one before it (the last one next to the first)
+    size = width * height
+    if len(cycle) != size or set(cycle) != set(range(size)):
+        return False
+    return all(abs(cell % width - previous % width) + abs(cell // width - previous // width) == 1 for previous, cell in zip(cycle[-1:] + cycle[:-1], cycle))
+
+
+# One cycle per board size, kept on disk in CYCLE_DIR
+@lru_cache(maxsize=None)
+def hamiltonian_cycle(width: int, height: int) -> tuple:
+    """The Hamiltonian cycle of the board and the position of every cell along it, as `(cycle, order)`
+
+    The cycle is read from `CYCLE_DIR` if it was saved there before, otherwise it is built and saved.
+    """
+
+    file_name = os.path.join(CYCLE_DIR, f'hamiltonian_{width}x{height}.json')
+    cycle = None
+    try:
+        with open(file_name) as file:
+            cycle = json.load(file)['cycle']
+        if not is_hamiltonian_cycle(cycle, width, height):
+            logger.warning(f'Ignoring the invalid cycle in {file_name}')
+            cycle = None
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    if cycle is None:
+        cycle = build_hamiltonian_cycle(width, height)
+        try:
+            os.makedirs(CYCLE_DIR, exist_ok=True)
+            with open(file_name, 'w') as file:
+                json.dump({'width': width, 'height': height, 'cycle': cycle}, file)
+        except OSError as error:
+            logger.warning(f'Could not save the cycle to {file_name}: {error}')
+
+    order = array('i', [0]) * len(cycle)
+    for position, cell in enumerate(cycle):
+        order[cell] = position
+    return tuple(cycle), order
 
 
 # Neural Network for Basic Q-Learning Agent
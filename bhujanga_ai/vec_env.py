@@ -0,0 +1,437 @@
+"""Vectorized snake environment, stepping many boards at once with NumPy"""
+# /bhujanga_ai/vec_env.py
+
+
+# Import the required modules
+import os
+import contextlib
+import weakref
+from random import SystemRandom
+from multiprocessing import Process, Semaphore, Value
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+# Import Helper Classes
+from helper import Direction, get_board
+
+
+# Required Constants
+# Directions are stored as their index in `Direction.MOVES` (UP, DOWN, LEFT, RIGHT)
+UP, DOWN, LEFT, RIGHT = range(4)
+
+# Actions are the same as the ones of `DQN_Snake.get_direction`: [straight, right turn, left turn]
+# TURN[direction, action] is the new direction
+CLOCK_WISE = [RIGHT, DOWN, LEFT, UP]
+TURN = np.array([
+    [direction, CLOCK_WISE[(CLOCK_WISE.index(direction) + 1) % 4], CLOCK_WISE[(CLOCK_WISE.index(direction) - 1) % 4]]
+    for direction in range(len(Direction.MOVES))
+], dtype=np.int64)
+
+# Rewards of a move, the same as the ones of `DQN_Snake`
+REWARD_FOOD = 10
+REWARD_DEATH = -10
+
+# Number of features of the state (see `DQN_Snake.get_state`)
+STATE_SIZE = 11
+
+# Commands sent to the workers of `SubprocVecSnakeEnv`
+CMD_STEP, CMD_RESET, CMD_CLOSE = range(3)
+
+# Seconds `SubprocVecSnakeEnv` waits for its workers to take up or finish a command
+WORKER_TIMEOUT = 30.0
+
+# Shared buffers of `SubprocVecSnakeEnv`: name -> (shape of one board, dtype)
+SHARED_BUFFERS = {
+    'actions'   : ((), np.int64),
+    'states'    : ((STATE_SIZE,), np.float32),
+    'rewards'   : ((), np.int64),
+    'dones'     : ((), np.bool_),
+    'scores'    : ((), np.int64),
+}
+
+
+# The Vectorized Environment
+class VecSnakeEnv:
+    """N snake boards kept in NumPy arrays and stepped together with a single call
+
+    The state of board i lives in row i of the arrays:
+        grid        : occupancy of every cell (head included)
+        ring        : ring buffer with the cell of every segment, `head_pos` points at the head
+        length      : number of segments (head included)
+        direction   : index of the direction in `Direction.MOVES`
+        food, score : food cell and score
+
+    Boards whose game is over are reset automatically at the end of `step`.
+    """
+
+    def __init__(
+        self,
+        n_envs          : int,
+        height          : int,
+        width           : int,
+        random_init     : bool = False,
+        seed            : int = None,
+        max_idle_steps  : int = None,
+    ) -> None:
+
+        # Initialize the environment
+        self.n_envs         = n_envs
+        self.board_height   = height
+        self.board_width    = width
+        self.size           = height * width
+        self.random_init    = random_init
+        self.seed           = seed if seed is not None else SystemRandom().getrandbits(32)
+        self.rng            = np.random.default_rng(self.seed)
+
+        # A game is over when the snake does not eat for this many steps (same rule as `RLGame.train`)
+        self.max_idle_steps = max_idle_steps if max_idle_steps is not None else 2 * height * width
+
+        # Board tables
+        self.board          = get_board(width, height)
+        self.neighbours     = np.array(self.board.neighbours, dtype=np.int64)
+        self.cell_x         = np.tile(np.arange(width), height)
+        self.cell_y         = np.repeat(np.arange(height), width)
+        self.rows           = np.arange(n_envs)
+
+        # State of the boards
+        self.grid           = np.zeros((n_envs, self.size), dtype=np.uint8)
+        self.ring           = np.zeros((n_envs, self.size), dtype=np.int64)
+        self.head_pos       = np.zeros(n_envs, dtype=np.int64)
+        self.length         = np.zeros(n_envs, dtype=np.int64)
+        self.direction      = np.zeros(n_envs, dtype=np.int64)
+        self.food           = np.zeros(n_envs, dtype=np.int64)
+        self.score          = np.zeros(n_envs, dtype=np.int64)
+        self.idle           = np.zeros(n_envs, dtype=np.int64)
+
+        self.reset()
+
+    # Reset all the boards
+    def reset(self) -> np.ndarray:
+        """Reset every board and return the states"""
+        self._reset_boards(self.rows)
+        return self.get_state()
+
+    # Reset the given boards
+    def _reset_boards(self, idx: np.ndarray) -> None:
+
+        # Initialize the snake at random location or fixed location (center of board moving right)
+        if self.random_init:
+            heads = self.rng.integers(0, self.size, size=len(idx))
+            self.direction[idx] = self.rng.integers(0, len(Direction.MOVES), size=len(idx))
+        else:
+            heads = np.full(len(idx), (self.board_height // 2) * self.board_width + self.board_width // 2)
+            self.direction[idx] = RIGHT
+
+        self.grid[idx] = 0
+        self.grid[idx, heads] = 1
+        self.ring[idx, 0] = heads
+        self.head_pos[idx] = 0
+        self.length[idx] = 1
+        self.score[idx] = 0
+        self.idle[idx] = 0
+
+        self._place_food(idx)
+
+    # Place the food on a random free cell of the given boards
+    def _place_food(self, idx: np.ndarray) -> None:
+
+        # Pick the j-th free cell, with j uniform over the number of free cells
+        free = self.grid[idx] == 0
+        counts = self.size - self.length[idx]
+        picks = (self.rng.random(len(idx)) * counts).astype(np.int64)
+        self.food[idx] = np.argmax(np.cumsum(free, axis=1) > picks[:, None], axis=1)
+
+    # Play a step on every board
+    def step(self, actions: np.ndarray) -> tuple:
+        """Move every snake with its action (0: straight, 1: right turn, 2: left turn)
+
+        Returns `(states, rewards, dones, scores)`, where `scores` are the scores reached in this step
+        (the final score for boards whose game is over, before they are reset).
+        """
+
+        rows = self.rows
+        size = self.size
+
+        # Update the snakes' direction and find the cell each head moves into
+        self.direction = TURN[self.direction, np.asarray(actions, dtype=np.int64)]
+        head = self.ring[rows, self.head_pos]
+        cell = self.neighbours[self.direction, head]
+
+        # Check for any collisions (with walls, snake's body or food)
+        # The tail moves out of the way in the same step, unless the snake is growing
+        wall = cell < 0
+        cell = np.where(wall, 0, cell)
+        grows = ~wall & (cell == self.food)
+        tail = self.ring[rows, (self.head_pos - self.length + 1) % size]
+        body = ~wall & (self.grid[rows, cell] == 1) & (grows | (cell != tail))
+        alive = ~(wall | body)
+
+        # Update the snakes' body accordingly
+        moving = rows[alive & ~grows]
+        self.grid[moving, tail[moving]] = 0
+        eaten = rows[alive & grows]
+        self.length[eaten] += 1
+
+        alive_rows = rows[alive]
+        self.head_pos[alive_rows] = (self.head_pos[alive_rows] + 1) % size
+        self.ring[alive_rows, self.head_pos[alive_rows]] = cell[alive_rows]
+        self.grid[alive_rows, cell[alive_rows]] = 1
+
+        # Score and reward
+        self.score[eaten] += 1
+        self.idle += 1
+        self.idle[eaten] = 0
+        rewards = np.where(alive, np.where(grows, REWARD_FOOD, 0), REWARD_DEATH)
+
+        # The game is over on a collision, when the snake starves or fills the whole board
+        full = self.length == size
+        dones = ~alive | (self.idle >= self.max_idle_steps) | full
+        scores = self.score.copy()
+
+        # Place new food for the snakes which ate and are still playing
+        eaten = eaten[~dones[eaten]]
+        if len(eaten):
+            self._place_food(eaten)
+
+        # Reset the boards whose game is over
+        if dones.any():
+            self._reset_boards(rows[dones])
+
+        return self.get_state(), rewards, dones, scores
+
+    # Define the state of the games
+    def get_state(self) -> np.ndarray:
+        """The `DQN_Snake.get_state` features of every board, as an (n_envs, 11) array"""
+
+        rows = self.rows
+        head = self.ring[rows, self.head_pos]
+
+        # Danger straight, right and left: a wall or the snake's body in the cell in that direction
+        cells = self.neighbours[TURN[self.direction], head[:, None]]
+        danger = (cells < 0) | (self.grid[rows[:, None], np.maximum(cells, 0)] == 1)
+
+        # Food location relative to the head
+        head_x, head_y = self.cell_x[head], self.cell_y[head]
+        food_x, food_y = self.cell_x[self.food], self.cell_y[self.food]
+
+        state = np.empty((self.n_envs, STATE_SIZE), dtype=np.float32)
+        state[:, 0:3] = danger
+        state[:, 3] = self.direction == UP
+        state[:, 4] = self.direction == RIGHT
+        state[:, 5] = self.direction == DOWN
+        state[:, 6] = self.direction == LEFT
+        state[:, 7] = food_x < head_x   # Food is to the left of the snake
+        state[:, 8] = food_y < head_y   # Food is above the snake
+        state[:, 9] = food_x > head_x   # Food is to the right of the snake
+        state[:, 10] = food_y > head_y  # Food is below the snake
+
+        return state
+
+    def __str__(self) -> str:
+        return f'VecSnakeEnv({self.n_envs} boards of {self.board_width}x{self.board_height})'
+
+    __repr__ = __str__
+
+
+# Attach NumPy arrays to the shared buffers
+def _attach_buffers(names: dict, n_envs: int) -> tuple:
+    blocks = {name: SharedMemory(name=names[name]) for name in SHARED_BUFFERS}
+    arrays = {
+        name: np.ndarray((n_envs, *shape), dtype=dtype, buffer=blocks[name].buf)
+        for name, (shape, dtype) in SHARED_BUFFERS.items()
+    }
+    return blocks, arrays
+
+
+# The loop of a worker process of `SubprocVecSnakeEnv`
+def _worker(names, n_envs, lo, hi, height, width, random_init, seed, max_idle_steps, command, start, finish, failed):
+
+    blocks, arrays = _attach_buffers(names, n_envs)
+
+    try:
+        # The boards start reset (as in `VecSnakeEnv`), the environment waits for their states before its first command
+        env = VecSnakeEnv(hi - lo, height, width, random_init, seed, max_idle_steps)
+        arrays['states'][lo:hi] = env.get_state()
+        finish.release()
+
+        while True:
+            start.acquire()
+            if command.value == CMD_CLOSE:
+                break
+
+            if command.value == CMD_STEP:
+                states, rewards, dones, scores = env.step(arrays['actions'][lo:hi])
+                arrays['rewards'][lo:hi] = rewards
+                arrays['dones'][lo:hi] = dones
+                arrays['scores'][lo:hi] = scores
+            else:
+                states = env.reset()
+                arrays['rewards'][lo:hi] = 0
+                arrays['dones'][lo:hi] = False
+                arrays['scores'][lo:hi] = 0
+            arrays['states'][lo:hi] = states
+
+            finish.release()
+    except BaseException:
+        # Release the main process right away instead of letting it wait for the timeout
+        failed.value = 1
+        finish.release()
+        raise
+    finally:
+        del arrays
+        for block in blocks.values():
+            block.close()
+
+
+# Stop the workers of a `SubprocVecSnakeEnv` and free its shared memory, also run when the environment is garbage
+# collected or the interpreter exits (it must not hold a reference to the environment)
+def _shutdown(workers, blocks, command, starts, timeout) -> None:
+
+    # Workers which are waiting for a command are told to stop, the others are given `timeout` seconds
+    command.value = CMD_CLOSE
+    for start in starts:
+        start.release()
+    for worker in workers:
+        worker.join(timeout)
+        if worker.is_alive():
+            worker.terminate()
+            worker.join()
+
+    for block in blocks.values():
+        # Arrays still viewing the block keep its mapping alive, the name is freed all the same
+        with contextlib.suppress(BufferError):
+            block.close()
+        with contextlib.suppress(FileNotFoundError):
+            block.unlink()
+
+
+# The Multi-Process Vectorized Environment
+class SubprocVecSnakeEnv:
+    """`VecSnakeEnv` split over worker processes, each stepping a slice of the boards
+
+    The actions, states, rewards, dones and scores live in shared memory and are never pickled.
+    Every `step`/`reset` writes the command, releases each worker's semaphore and waits until all
+    of them have released a shared one. Unlike a barrier, a semaphore is never left locked by a
+    worker killed while waiting on it, so the timeouts below always hold. The arrays returned by
+    `step`/`reset` are views of the shared buffers, so they are overwritten by the next call (copy
+    them to keep them). Worker i plays the boards of its slice with the seed `seed + i`, like a
+    `VecSnakeEnv` of its own.
+
+    A worker which dies, or does not finish a command within `timeout` seconds, closes the environment
+    and the call raises. The workers are stopped and the shared memory freed by `close` (or the `with`
+    block), else when the environment is garbage collected or the interpreter exits.
+    """
+
+    def __init__(
+        self,
+        n_envs          : int,
+        height          : int,
+        width           : int,
+        n_workers       : int = None,
+        random_init     : bool = False,
+        seed            : int = None,
+        max_idle_steps  : int = None,
+        timeout         : float = WORKER_TIMEOUT,
+    ) -> None:
+
+        # Initialize the environment
+        self.n_envs         = n_envs
+        self.board_height   = height
+        self.board_width    = width
+        self.n_workers      = min(n_workers or os.cpu_count() or 1, n_envs)
+        self.seed           = seed if seed is not None else SystemRandom().getrandbits(32)
+        self.timeout        = timeout
+        self.closed         = False
+
+        # Create the shared buffers
+        self.blocks = {
+            name: SharedMemory(create=True, size=max(1, n_envs * int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize))
+            for name, (shape, dtype) in SHARED_BUFFERS.items()
+        }
+        self.arrays = {
+            name: np.ndarray((n_envs, *shape), dtype=dtype, buffer=self.blocks[name].buf)
+            for name, (shape, dtype) in SHARED_BUFFERS.items()
+        }
+        names = {name: block.name for name, block in self.blocks.items()}
+
+        # Start the workers, worker i playing the boards [bounds[i], bounds[i + 1]) with seed `seed + i`
+        self.command    = Value('i', CMD_RESET, lock=False)
+        self.starts     = [Semaphore(0) for _ in range(self.n_workers)]
+        self.finish     = Semaphore(0)
+        self.failed     = Value('i', 0, lock=False)
+        bounds          = np.linspace(0, n_envs, self.n_workers + 1).astype(int)
+
+        self.workers = [
+            Process(
+                target=_worker,
+                args=(
+                    names, n_envs, bounds[i], bounds[i + 1], height, width, random_init,
+                    self.seed + i, max_idle_steps, self.command, self.starts[i], self.finish, self.failed,
+                ),
+                daemon=True,
+            )
+            for i in range(self.n_workers)
+        ]
+        self._finalizer = weakref.finalize(self, _shutdown, self.workers, self.blocks, self.command, self.starts, timeout)
+        for worker in self.workers:
+            worker.start()
+        self._wait()
+
+    # Run a command on all the workers
+    def _run(self, command: int) -> None:
+        if self.closed:
+            raise RuntimeError('The environment is closed')
+        self.command.value = command
+        for start in self.starts:
+            start.release()
+        self._wait()
+
+    # Wait for every worker to be done with its command
+    def _wait(self) -> None:
+
+        # A worker died or is stuck: the environment is closed, stopping the others
+        if not all(self.finish.acquire(timeout=self.timeout) for _ in self.workers) or self.failed.value:
+            self.close()
+            failed = {i: worker.exitcode for i, worker in enumerate(self.workers) if worker.exitcode}
+            raise RuntimeError(
+                f'Workers died or did not finish within {self.timeout} seconds (worker: exit code {failed}), the environment is closed'
+            ) from None
+
+    # Reset all the boards
+    def reset(self) -> np.ndarray:
+        """Reset every board and return the states"""
+        self._run(CMD_RESET)
+        return self.arrays['states']
+
+    # Play a step on every board
+    def step(self, actions: np.ndarray) -> tuple:
+        """Same as `VecSnakeEnv.step`, the returned arrays are views of the shared buffers"""
+        self.arrays['actions'][:] = actions
+        self._run(CMD_STEP)
+        return self.arrays['states'], self.arrays['rewards'], self.arrays['dones'], self.arrays['scores']
+
+    # Define the state of the games
+    def get_state(self) -> np.ndarray:
+        """Same as `VecSnakeEnv.get_state`, a copy of the shared states"""
+        if self.closed:
+            raise RuntimeError('The environment is closed')
+        return self.arrays['states'].copy()
+
+    # Stop the workers and free the shared memory
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.arrays = {}
+        self._finalizer()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __str__(self) -> str:
+        return f'SubprocVecSnakeEnv({self.n_envs} boards of {self.board_width}x{self.board_height}, {self.n_workers} workers)'
+
+    __repr__ = __str__
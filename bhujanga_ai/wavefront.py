@@ -0,0 +1,108 @@
+"""Batched BFS over many boards at once, expanding the wavefronts with NumPy shifts and masks"""
+# /bhujanga_ai/wavefront.py
+
+
+# Import the required modules
+import numpy as np
+
+# Import Helper Classes
+from vec_env import VecSnakeEnv, TURN
+
+
+# Distance of the cells the wave never reaches
+UNREACHED = -1
+
+
+# Flood fill of every board from its source cell
+def wavefront_distances(blocked: np.ndarray, sources: np.ndarray, targets: np.ndarray = None) -> np.ndarray:
+    """BFS distances from the source of every board, as an (N, H, W) int32 array (-1 for cells not reached)
+
+    `blocked` is an (N, H, W) boolean array of the cells the wave cannot enter, `sources` holds the flat cell index
+    (y * W + x) of the source of every board, -1 for boards without one. The source itself is always reached.
+    Every step of the wave moves the frontiers of all the boards by one cell in the four directions at once.
+
+    With `targets` (flat cell indices, -1 for none) the fill stops as soon as every board has reached its target or
+    has no frontier left, the distances further out are then left unreached. `targets` may also be an (N, K) array,
+    a board is then done once it reaches any of its targets.
+    """
+
+    n_boards, height, width = blocked.shape
+    distances = np.full(blocked.shape, UNREACHED, dtype=np.int32)
+    rows = np.arange(n_boards)
+    has_source = sources >= 0
+
+    # The wave starts at the sources, `open_cells` are the cells it can still enter
+    frontier = np.zeros(blocked.shape, dtype=np.bool_)
+    frontier.reshape(n_boards, -1)[rows[has_source], sources[has_source]] = True
+    open_cells = ~blocked
+    open_cells &= ~frontier
+    distances[frontier] = 0
+
+    # Boards which are done (no target to wait for, or the target is reached)
+    flat_distances = distances.reshape(n_boards, -1)
+    if targets is not None:
+        targets = np.asarray(targets).reshape(n_boards, -1)
+        valid = targets >= 0
+        waiting = valid.any(axis=1)
+        targets = np.where(valid, targets, 0)
+
+    spread = np.empty_like(frontier)
+    step = 0
+    while True:
+        if targets is not None:
+            waiting &= ~((flat_distances[rows[:, None], targets] != UNREACHED) & valid).any(axis=1)
+            if not (waiting & frontier.any(axis=(1, 2))).any():
+                break
+        elif not frontier.any():
+            break
+
+        # Shift the frontier one cell down, up, right and left, then keep the open cells
+        step += 1
+        spread[:] = False
+        np.logical_or(spread[:, 1:, :], frontier[:, :-1, :], out=spread[:, 1:, :])
+        np.logical_or(spread[:, :-1, :], frontier[:, 1:, :], out=spread[:, :-1, :])
+        np.logical_or(spread[:, :, 1:], frontier[:, :, :-1], out=spread[:, :, 1:])
+        np.logical_or(spread[:, :, :-1], frontier[:, :, 1:], out=spread[:, :, :-1])
+        np.logical_and(spread, open_cells, out=spread)
+
+        # The new frontier is a subset of the open cells, it is closed and stamped with its distance
+        np.logical_xor(open_cells, spread, out=open_cells)
+        np.copyto(distances, step, where=spread)
+        frontier, spread = spread, frontier
+
+    return distances
+
+
+# One decision per board of a vectorized environment
+def wavefront_actions(env: VecSnakeEnv) -> np.ndarray:
+    """The action (see `vec_env.TURN`) of a BFS snake on every board of `env`, in one batched flood fill
+
+    The wave runs from the food of every board over the free cells until it reaches a cell the snake can move into.
+    The whole body blocks it, head and tail included, as in the search of `BFS_Basic_Snake`. Every snake then moves
+    to the cell closest to the food, the next cell of a shortest path as long as the one of `BFS_Basic_Snake` (ties
+    may be broken the other way). A snake without a path to the food takes the first move which does not end the game
+    right away (straight if there is none, the tail moves out of the way), where `BFS_Basic_Snake` has no move.
+    """
+
+    rows = env.rows
+    size = env.size
+
+    # The cell of every action (straight, right turn, left turn)
+    head = env.ring[rows, env.head_pos]
+    tail = env.ring[rows, (env.head_pos - env.length + 1) % size]
+    cells = env.neighbours[TURN[env.direction], head[:, None]]
+    wall = cells < 0
+
+    # The body blocks the wave, which stops once it reaches the cell of an action
+    blocked = env.grid.astype(np.bool_).reshape(env.n_envs, env.board_height, env.board_width)
+    distances = wavefront_distances(blocked, env.food, cells)
+
+    # Distance to the food of the cell of every action
+    cells = np.where(wall, 0, cells)
+    near = distances.reshape(env.n_envs, -1)[rows[:, None], cells]
+    near = np.where(wall | (near == UNREACHED), size, near)
+
+    # Moves which do not end the game right away, the fallback when the food is out of reach
+    safe = ~wall & ((env.grid[rows[:, None], cells] == 0) | (cells == tail[:, None]))
+
+    return np.where(near.min(axis=1) < size, near.argmin(axis=1), np.argmax(safe, axis=1))
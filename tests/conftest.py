@@ -0,0 +1,8 @@
+import os
+import sys
+
+
+# The modules of the game import each other from the package directory (e.g. `from helper import Direction`)
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bhujanga_ai')
+if PACKAGE_DIR not in sys.path:
+    sys.path.append(PACKAGE_DIR)
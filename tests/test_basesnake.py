@@ -0,0 +1,144 @@
+import pytest
+from random import Random
+
+from helper import Direction, StepStatus, WallCollisionError
+from snakes.basesnake import BaseSnake, OPPOSITE
+
+
+# Everything a move may change
+def state_of(snake: BaseSnake) -> tuple:
+    return (
+        bytes(snake._grid), snake._ring.tobytes(), snake._free.tobytes(), snake._free_pos.tobytes(), snake._head_pos,
+        snake._length, snake._free_count, snake._food_cell, snake.direction, snake.zobrist, snake.score, snake.rng.getstate(),
+    )
+
+
+def test_a_collision_leaves_the_snake_where_it_was():
+    # The snake starts at (2, 2) moving right, goes to the right edge, turns down and then turns right into the wall
+    snake = BaseSnake(4, 4, seed=0)
+    assert snake.step(Direction.RIGHT)[0] in (StepStatus.OK, StepStatus.ATE)
+    assert snake.step(Direction.DOWN)[0] in (StepStatus.OK, StepStatus.ATE)
+
+    before = state_of(snake)
+    assert snake.step(Direction.RIGHT)[0] == StepStatus.WALL
+    assert state_of(snake) == before
+    with pytest.raises(WallCollisionError):
+        snake.apply(Direction.RIGHT)
+    assert state_of(snake) == before
+
+
+# Random moves which do not end the game (the snake is put back on a new board when it is boxed in)
+def random_moves(snake: BaseSnake, moves: int, seed: int = 0):
+    rng = Random(seed)
+    for _ in range(moves):
+        directions = [
+            direction for direction in Direction.MOVES
+            if direction != OPPOSITE[snake.direction] and snake.copy().step(direction)[0] in (StepStatus.OK, StepStatus.ATE)
+        ] if snake._food_cell >= 0 else []
+        if not directions:
+            snake.reset()
+            continue
+        snake.step(rng.choice(directions))
+        yield snake
+
+
+@pytest.mark.parametrize('width, height', [(1, 6), (6, 1), (2, 2), (5, 7), (10, 10)])
+def test_zobrist_hash_matches_a_hash_from_scratch(width, height):
+    snake = BaseSnake(height, width, seed=width * height)
+    for snake in random_moves(snake, 300):
+        assert snake.zobrist == snake.compute_zobrist()
+
+
+# The state a move may change, without the stale slots of the ring and the free cells
+def live_state_of(snake: BaseSnake) -> tuple:
+    free = snake._free[:snake._free_count]
+    return (
+        bytes(snake._grid), tuple(snake.body), tuple(free), tuple(snake._free_pos[cell] for cell in free),
+        snake._food_cell, snake.direction, snake.zobrist, snake.score, snake.rng.getstate(),
+    )
+
+
+# Moves which do not end the game from the current state of the snake
+def safe_directions(snake: BaseSnake) -> list:
+    return [
+        direction for direction in Direction.MOVES
+        if direction != OPPOSITE[snake.direction] and snake.copy().step(direction)[0] in (StepStatus.OK, StepStatus.ATE)
+    ] if snake._food_cell >= 0 else []
+
+
+def test_undo_restores_the_state_before_apply():
+    rng = Random(1)
+    for snake in random_moves(BaseSnake(5, 6, seed=1), 200, seed=1):
+        before = live_state_of(snake)
+
+        # A few moves deep, then back up again
+        records, states = [], []
+        for _ in range(rng.randint(1, 6)):
+            directions = safe_directions(snake)
+            if not directions:
+                break
+            states.append(live_state_of(snake))
+            records.append(snake.apply(rng.choice(directions)))
+        while records:
+            snake.undo(records.pop())
+            assert live_state_of(snake) == states.pop()
+
+        assert live_state_of(snake) == before
+
+
+def test_restore_brings_back_the_snapshot():
+    snake = BaseSnake(6, 5, seed=2)
+    moves = random_moves(snake, 300, seed=2)
+    for _ in range(20):
+        next(moves)
+    state = snake.snapshot()
+    before = live_state_of(snake)
+
+    # The snapshot stays valid, and a restored snake plays on the same way (the same food after every meal)
+    replays = []
+    for seed in (3, 3, 4):
+        snake.restore(state)
+        assert live_state_of(snake) == before
+        replays.append([live_state_of(snake) for _, snake in zip(range(40), random_moves(snake, 40, seed=seed))])
+    assert replays[0] == replays[1]
+
+
+def test_a_seed_replays_the_food():
+    # The same seed and the same moves give the same food after every meal, another seed other food
+    foods = []
+    for seed in (7, 7, 8):
+        snake = BaseSnake(6, 6, seed=seed)
+        foods.append([snake.food] + [snake.food for snake in random_moves(snake, 200)])
+    assert foods[0] == foods[1]
+    assert foods[0] != foods[2]
+
+
+@pytest.mark.parametrize('width, height', [(1, 6), (5, 7), (10, 10)])
+def test_grid_and_ring_follow_the_body(width, height):
+    snake = BaseSnake(height, width, seed=width + height)
+    for snake in random_moves(snake, 300, seed=width):
+        # The ring holds the segments from the tail to the head, the grid marks exactly their cells
+        segments = [snake._ring[(snake._head_pos - i) % snake._capacity] for i in range(snake._length)]
+        assert bytes(snake._grid) == bytes(1 if cell in segments else 0 for cell in range(snake._capacity))
+        assert len(set(segments)) == snake._length == len(snake.body) + 1
+        assert snake.head == snake._cells[segments[0]] and list(snake.body) == [snake._cells[cell] for cell in segments[1:]]
+        assert snake.tail == (snake._cells[segments[-1]] if snake._length > 1 else None)
+
+
+def test_free_cells_are_indexed_and_hold_the_food():
+    snake = BaseSnake(4, 5, seed=4)
+    for snake in random_moves(snake, 300, seed=4):
+        # The first `_free_count` slots are the cells off the snake, `_free_pos` points back at their slots
+        free = snake._free[:snake._free_count]
+        assert sorted(free) == [cell for cell in range(snake._capacity) if not snake._grid[cell]]
+        assert all(snake._free[snake._free_pos[cell]] == cell for cell in free)
+        assert snake._food_cell in free and snake.food == snake._cells[snake._food_cell]
+
+    # Food is drawn evenly from the free cells (about 1000 draws on each of the 19 cells off the snake)
+    snake = BaseSnake(4, 5, seed=4)
+    draws = [0] * snake._capacity
+    for _ in range(19000):
+        snake._place_food()
+        draws[snake._food_cell] += 1
+    head = snake._ring[snake._head_pos]
+    assert draws[head] == 0 and min(draws[cell] for cell in range(snake._capacity) if cell != head) > 800
@@ -0,0 +1,56 @@
+import pytest
+
+from helper import Direction
+from snakes.basesnake import BaseSnake, DIRECTION_IDS, OPPOSITE
+from snakes.bitboard import Bitboard
+from tests.test_basesnake import random_moves
+from tests.test_finders import game_moves, shortest_path_length
+from tests.test_utils import bfs_distances
+
+
+# Check every query of the bitboard against a plain BFS on the snake's grid
+def check_bitboard(snake: BaseSnake, bitboard: Bitboard) -> None:
+    board = snake.board
+    head, food = snake._ring[snake._head_pos], snake._food_cell
+
+    def free(cell):
+        return not snake._grid[cell]
+
+    def free_or_food(cell):
+        return free(cell) or cell == food
+
+    # The region of every free cell
+    for cell in range(board.size):
+        expected = len(bfs_distances(snake, cell, free)) if free(cell) else 0
+        assert bitboard.region_size(board.cells[cell]) == expected
+
+    # The regions of the moves of the head
+    expected = {}
+    for direction in Direction.MOVES:
+        cell = board.neighbours[DIRECTION_IDS[direction]][head]
+        if direction != OPPOSITE[snake.direction] and cell >= 0 and free(cell):
+            expected[direction] = len(bfs_distances(snake, cell, free))
+    assert bitboard.move_regions() == expected
+
+    # The distance from the head to the food (which the head may reach from any side)
+    assert bitboard.distance(snake.head, snake.food) == bfs_distances(snake, head, free_or_food).get(food, -1)
+
+    # Whether the head reaches its tail, the tail being passable
+    if snake._length > 1:
+        body = [snake._ring[(snake._head_pos - pos) % snake._capacity] for pos in range(snake._length)]
+        reachable = shortest_path_length(snake, body[-1], exclude_tail=True) is not None
+        assert bitboard.tail_reachable(body, snake.direction) == reachable
+
+
+@pytest.mark.parametrize('width, height', [(1, 6), (7, 1), (5, 5), (8, 9)])
+def test_bitboard_matches_a_plain_bfs_after_random_moves(width, height):
+    snake = BaseSnake(height, width, seed=7)
+    bitboard = Bitboard(snake)
+    for snake in random_moves(snake, 400, seed=7):
+        check_bitboard(snake, bitboard)
+
+
+def test_bitboard_of_the_look_ahead_snake_matches_a_plain_bfs():
+    # The long body of a look ahead game shuts the head in small regions and away from its tail
+    for snake in game_moves(10, 10, seed=0, moves=600):
+        check_bitboard(snake, snake.bitboard)
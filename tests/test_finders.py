@@ -0,0 +1,157 @@
+from functools import partial
+
+import pytest
+
+from helper import StepStatus
+from snakes.basesnake import BaseSnake, DIRECTION_IDS, OPPOSITE
+from snakes.pathfinding_snakes import BFS_LookAhead_LongerPath_Snake
+from snakes.utils import BFS_Finder, AStar_Finder, BiBFS_Finder, DStarLite_Finder
+from tests.test_utils import bfs_distances
+
+
+FINDERS = [BFS_Finder, AStar_Finder, BiBFS_Finder, DStarLite_Finder]
+
+
+# Length of a shortest path from the head to the cell (None if there is none), by a plain BFS
+def shortest_path_length(snake: BaseSnake, end: int, exclude_tail: bool = False):
+    head = snake._ring[snake._head_pos]
+    tail = snake._ring[(snake._head_pos - snake._length + 1) % snake._capacity] if exclude_tail else -1
+
+    def passable(cell):
+        return not snake._grid[cell] or cell == tail
+
+    # The head is part of the body, so only the first move can be the reverse one
+    back = snake.board.neighbours[DIRECTION_IDS[OPPOSITE[snake.direction]]][head]
+    lengths = [
+        distances[end] + 1
+        for distances in (
+            bfs_distances(snake, steps[head], passable) for steps in snake.board.neighbours
+            if steps[head] >= 0 and steps[head] != back and passable(steps[head])
+        )
+        if end in distances
+    ]
+    return min(lengths, default=None)
+
+
+# Follow the path of the finder from the head, checking every move, and return its length
+def followed_path_length(snake: BaseSnake, finder, end: int, exclude_tail: bool = False) -> int:
+    board = snake.board
+    tail = snake._ring[(snake._head_pos - snake._length + 1) % snake._capacity] if exclude_tail else -1
+    current = snake._ring[snake._head_pos]
+    assert finder.path.get(board.cells[current]) != OPPOSITE[snake.direction]
+
+    for _ in range(len(finder.path)):
+        current = board.neighbours[DIRECTION_IDS[finder.path[board.cells[current]]]][current]
+        assert current >= 0 and (not snake._grid[current] or current == tail)
+    assert current == end
+    return len(finder.path)
+
+
+# The moves of a game of the longer path snake, whose long body winds over the whole board
+def game_moves(height: int, width: int, seed: int, moves: int = 1500):
+    snake = BFS_LookAhead_LongerPath_Snake(height, width, seed=seed)
+    for _ in range(moves):
+        if snake._food_cell < 0:
+            return
+        if not snake.finder.path_exists():
+            snake.finder.start, snake.finder.end = snake.head, snake.food
+            snake.find_path()
+            if not snake.finder.path_exists():
+                return
+        if snake.step(snake.finder.path.pop(snake.head))[0] > StepStatus.ATE:
+            return
+        yield snake
+
+
+@pytest.mark.parametrize('finder_class', FINDERS)
+def test_paths_are_as_short_as_a_plain_bfs(finder_class):
+    for seed in range(2):
+        # The same finder replans after every move (D* Lite repairs its search from the last one)
+        for moves, snake in enumerate(game_moves(10, 10, seed)):
+            if moves == 0:
+                finder = finder_class(snake, snake.food)
+
+            tail = snake._ring[(snake._head_pos - snake._length + 1) % snake._capacity]
+            queries = [(snake._food_cell, False)] + ([(tail, True)] if snake._length > 1 else [])
+            for end, exclude_tail in queries:
+                finder.start, finder.end = snake.head, snake.board.cells[end]
+                finder.find_path(exclude_tail=exclude_tail)
+
+                expected = shortest_path_length(snake, end, exclude_tail)
+                if expected is None:
+                    assert not finder.path
+                else:
+                    assert followed_path_length(snake, finder, end, exclude_tail) == expected
+
+
+# Follow the path from the head on a copy of the snake, checking that no step collides, and return the copy
+def replay(snake: BaseSnake, path: dict) -> BaseSnake:
+    virtual = snake.copy()
+    for _ in range(len(path)):
+        status, _ = virtual.step(path[virtual.head])
+        assert status in (StepStatus.OK, StepStatus.ATE)
+    return virtual
+
+
+def body_of(snake: BaseSnake) -> list:
+    return [snake._ring[(snake._head_pos - pos) % snake._capacity] for pos in range(snake._length)]
+
+
+def test_time_aware_paths_move_through_the_vacated_cells_without_collision():
+    through_body = 0
+    for seed in range(3):
+        for snake in game_moves(10, 10, seed, moves=800):
+            finder = BFS_Finder(snake, snake.food)
+            finder.start, finder.end = snake.head, snake.food
+            finder.find_path(time_aware=True)
+            if not finder.path:
+                continue
+
+            virtual = replay(snake, finder.path)
+            assert virtual._ring[virtual._head_pos] == snake._food_cell
+
+            # Some of the paths go through cells the tail has only just left
+            body = set(body_of(snake))
+            through_body += any(snake.board.cell(cell) in body for cell in finder.path if cell != snake.head)
+    assert through_body > 0
+
+
+def test_projected_body_equals_the_body_replayed_on_a_copy():
+    for seed in range(2):
+        for snake in game_moves(10, 10, seed, moves=800):
+            finder = BFS_Finder(snake, snake.food)
+            tail = snake._ring[(snake._head_pos - snake._length + 1) % snake._capacity]
+            queries = [(snake.food, finder.find_path), (snake.food, partial(finder.find_path, time_aware=True))]
+            if snake._length > 1:
+                queries.append((snake.board.cells[tail], finder.find_longer_path))
+
+            # A path may only reach the food at its end (see `BaseSnake.project_path`)
+            for end, search in queries:
+                finder.start, finder.end = snake.head, end
+                search()
+                if not finder.path or (end != snake.food and snake.food in finder.path):
+                    continue
+                virtual = replay(snake, finder.path)
+                assert snake.project_path(finder.path) == (body_of(virtual), virtual.direction)
+
+
+def test_longer_paths_are_valid_and_no_shorter_than_a_plain_bfs():
+    stretched = 0
+    for seed in range(2):
+        for snake in game_moves(10, 10, seed, moves=800):
+            if snake._length == 1:
+                continue
+            tail = snake._ring[(snake._head_pos - snake._length + 1) % snake._capacity]
+            finder = BFS_Finder(snake, snake.board.cells[tail])
+            finder.start, finder.end = snake.head, snake.board.cells[tail]
+
+            shortest = shortest_path_length(snake, tail, exclude_tail=True)
+            assert finder.find_longer_path() == (shortest is not None)
+            if shortest is None:
+                continue
+
+            # The path ends on the tail (which moves out of the way) and never collides on the way
+            assert followed_path_length(snake, finder, tail, exclude_tail=True) >= shortest
+            replay(snake, finder.path)
+            stretched += len(finder.path) > shortest
+    assert stretched > 0
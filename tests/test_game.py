@@ -0,0 +1,20 @@
+import pytest
+
+from game import Game
+from snakes.pathfinding_snakes import BFS_LookAhead_Snake, Hamiltonian_Snake
+
+
+@pytest.mark.parametrize('width, height', [(10, 10), (20, 20), (30, 30), (17, 24)])
+def test_hamiltonian_game_ends_with_the_board_full(width, height):
+    # The game goes on until there is no food left, whatever the size of the board
+    game = Game(height, width, agent=Hamiltonian_Snake, log=False, debug=False, show_display=False, seed=0)
+    assert game.play() == width * height - 1
+    assert game.agent._length == width * height and game.agent.food is None
+
+
+def test_a_seed_replays_the_game():
+    # The food of the game is drawn from the seed only, so the same seed plays the same game
+    games = [Game(8, 8, agent=BFS_LookAhead_Snake, log=False, debug=False, show_display=False, seed=seed) for seed in (5, 5, 6)]
+    results = [(game.play(), game.agent.zobrist, tuple(game.agent.body), len(game.decision_times)) for game in games]
+    assert results[0] == results[1]
+    assert results[0] != results[2]
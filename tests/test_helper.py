@@ -0,0 +1,38 @@
+import pickle
+from copy import copy, deepcopy
+
+import pytest
+
+from helper import Direction, Point, get_board
+from snakes.basesnake import BaseSnake
+from tests.test_basesnake import random_moves
+
+
+def test_points_are_immutable_and_copied_as_themselves():
+    point = Point(2, 3)
+    with pytest.raises(AttributeError):
+        point.x = 4
+    assert point.copy() is point and copy(point) is point and deepcopy(point) is point
+    assert pickle.loads(pickle.dumps(point)) == point and hash(Point(2, 3)) == hash(point)
+
+
+@pytest.mark.parametrize('width, height', [(1, 1), (1, 6), (5, 7), (10, 10)])
+def test_board_cells_and_neighbours(width, height):
+    board = get_board(width, height)
+
+    # One board per size, shared by the snakes and kept by pickling
+    assert get_board(width, height) is board and pickle.loads(pickle.dumps(board)) is board
+    assert BaseSnake(height, width, seed=0).board is board
+
+    # Every cell is interned at its index, the neighbour tables agree with moving the point
+    for idx, point in enumerate(board.cells):
+        assert (point.x, point.y) == (idx % width, idx // width) and board.cell(point) == idx
+        for direction, neighbours in zip(Direction.MOVES, board.neighbours):
+            assert neighbours[idx] == board.cell(point + direction)
+    assert board.cell(Point(-1, 0)) == board.cell(Point(width, height - 1)) == -1
+
+
+def test_the_snake_is_made_of_interned_cells():
+    for snake in random_moves(BaseSnake(6, 6, seed=1), 100, seed=1):
+        assert snake.head is snake.board.cells[snake.board.cell(snake.head)]
+        assert all(point is snake.board.cells[snake.board.cell(point)] for point in snake.body)
@@ -0,0 +1,43 @@
+from random import Random
+
+import pytest
+
+from helper import StepStatus
+from snakes.mcts_snakes import MCTS_Snake
+
+
+def test_planning_leaves_the_snake_untouched():
+    snake = MCTS_Snake(8, 8, seed=3)
+    snake.rollout_budget = 50
+    for _ in range(40):
+        state = (snake.zobrist, bytes(snake._grid), snake._ring.tobytes(), snake._free.tobytes(), snake.rng.getstate(), snake.score, snake.direction)
+        snake.find_path()
+        assert state == (snake.zobrist, bytes(snake._grid), snake._ring.tobytes(), snake._free.tobytes(), snake.rng.getstate(), snake.score, snake.direction)
+        status, _ = snake.step(snake.finder.path[snake.head])
+        if status in (StepStatus.WALL, StepStatus.BODY):
+            break
+    assert snake.rollouts > 0 and snake.rollouts_per_second > 0
+
+
+def test_rollouts_do_not_replay_the_food_of_the_game():
+    # The food of the game is drawn from `Random(seed)`
+    snake = MCTS_Snake(8, 8, seed=3)
+    game_draws = Random(snake.seed)
+    assert [snake.simulator.rng.random() for _ in range(5)] != [game_draws.random() for _ in range(5)]
+
+    # The rollouts are still replayed with the game
+    assert MCTS_Snake(8, 8, seed=3).simulator.rng.random() == MCTS_Snake(8, 8, seed=3).simulator.rng.random()
+
+
+def test_rollout_budget_is_checked_and_an_empty_search_takes_a_safe_move(monkeypatch):
+    monkeypatch.setattr(MCTS_Snake, 'rollout_budget', 0)
+    with pytest.raises(ValueError):
+        MCTS_Snake(8, 8, seed=3)
+    monkeypatch.undo()
+
+    snake = MCTS_Snake(8, 8, seed=3)
+    snake.rollout_budget = 0
+    for _ in range(20):
+        snake.find_path()
+        status, _ = snake.step(snake.finder.path[snake.head])
+        assert status in (StepStatus.OK, StepStatus.ATE)
@@ -0,0 +1,140 @@
+import pytest
+
+from helper import StepStatus
+from snakes.pathfinding_snakes import BFS_LookAhead_Snake, BFS_LookAhead_LongerPath_Snake, Hamiltonian_Snake
+from snakes.utils import DStarLite_Finder, TranspositionCache
+
+
+# Play the snake until the board is full (no food left) or it has no move
+def play_to_the_end(snake) -> int:
+    for _ in range(4 * snake.board.size ** 2):
+        if snake._food_cell < 0:
+            break
+        snake.find_path()
+        assert snake.finder.path, f'No move at score {snake.score}'
+        status, _ = snake.step(snake.finder.path[snake.head])
+        assert status in (StepStatus.OK, StepStatus.ATE)
+    return snake.score
+
+
+@pytest.mark.parametrize('width, height', [(2, 2), (2, 3), (3, 2), (4, 4), (6, 5), (7, 10), (10, 10)])
+def test_hamiltonian_snake_fills_the_board(width, height):
+    for seed in range(20):
+        snake = Hamiltonian_Snake(height, width, seed=seed)
+        play_to_the_end(snake)
+        assert snake._length == width * height
+
+
+@pytest.mark.parametrize('agent', [BFS_LookAhead_Snake, BFS_LookAhead_LongerPath_Snake])
+def test_only_the_finder_of_the_snake_watches_the_board(agent, monkeypatch):
+    monkeypatch.setattr(agent, 'finder_class', DStarLite_Finder)
+    snake = agent(10, 10, seed=0)
+    assert [watcher for watcher in snake._watchers if isinstance(watcher, DStarLite_Finder)] == [snake.finder]
+
+
+@pytest.mark.parametrize('agent', [BFS_LookAhead_Snake, BFS_LookAhead_LongerPath_Snake])
+def test_expired_plans_take_a_free_move(agent, monkeypatch):
+    # Without any budget every plan is cut short, the snake keeps moving into free cells until it is boxed in
+    monkeypatch.setattr(agent, 'deadline_us', 0)
+    snake = agent(10, 10, seed=1)
+    for _ in range(300):
+        snake.find_path()
+        if not snake.finder.path:
+            break
+        status, _ = snake.step(snake.finder.path[snake.head])
+        assert status in (StepStatus.OK, StepStatus.ATE)
+    assert snake.deadline_hits > 0
+
+
+def test_only_plans_without_deadline_are_deterministic(monkeypatch):
+    # The game only declares a loop for deterministic agents (see `Game.play`)
+    assert BFS_LookAhead_Snake(10, 10, seed=0).deterministic
+    monkeypatch.setattr(BFS_LookAhead_Snake, 'deadline_us', 100)
+    assert not BFS_LookAhead_Snake(10, 10, seed=0).deterministic
+
+
+def test_plan_cache_is_opt_in_and_per_game(monkeypatch):
+    assert BFS_LookAhead_Snake(10, 10, seed=0).plan_cache is None
+
+    monkeypatch.setattr(BFS_LookAhead_Snake, 'use_plan_cache', True)
+    first, second = BFS_LookAhead_Snake(10, 10, seed=0), BFS_LookAhead_Snake(10, 10, seed=0)
+    assert first.plan_cache is not None and first.plan_cache is not second.plan_cache
+
+    # The plans are the same with the cache, which holds every plan made
+    plans = 0
+    for _ in range(200):
+        if not first.finder.path_exists():
+            for snake in (first, second):
+                snake.finder.start, snake.finder.end = snake.head, snake.food
+                snake.find_path()
+            plans += 1
+            assert first.finder.path == second.finder.path
+            if not first.finder.path_exists():
+                break
+        direction = first.finder.path.pop(first.head)
+        assert second.finder.path.pop(second.head) == direction
+        first.step(direction)
+        second.step(direction)
+    assert len(first.plan_cache) == first.plan_cache.misses == plans
+
+
+def test_plan_cache_keeps_to_its_memory_cap():
+    cache = TranspositionCache(max_bytes=10 * TranspositionCache.ENTRY_BYTES)
+    for key in range(20):
+        cache.put(key, ())
+        assert cache.bytes <= cache.max_bytes
+    assert len(cache) == 10 and cache.evictions == 10
+    assert cache.get(0) is None and cache.get(19) == ()
+
+    # Replacing a plan replaces its size, a longer plan drops more of the older ones
+    cache.put(19, ())
+    assert cache.bytes == 10 * TranspositionCache.ENTRY_BYTES
+    cache.put(19, ((None, None),) * 2)
+    assert len(cache) == 9 and cache.bytes == 9 * TranspositionCache.ENTRY_BYTES + 2 * TranspositionCache.STEP_BYTES
+
+
+def test_plan_cache_hit_gives_the_plan_of_a_fresh_search(monkeypatch):
+    monkeypatch.setattr(BFS_LookAhead_Snake, 'use_plan_cache', True)
+    cached, fresh = BFS_LookAhead_Snake(10, 10, seed=2), BFS_LookAhead_Snake(10, 10, seed=2)
+    fresh.plan_cache = None
+    for snake in (cached, fresh):
+        snake.finder.start, snake.finder.end = snake.head, snake.food
+
+    # Planning twice from the same state takes the second plan from the cache
+    cached.find_path()
+    first = dict(cached.finder.path)
+    cached.find_path()
+    assert (cached.plan_cache.hits, cached.plan_cache.misses) == (1, 1)
+    assert cached.finder.path == first
+
+    fresh.find_path()
+    assert fresh.finder.path == first
+
+
+def test_plan_cache_tells_the_configurations_apart(monkeypatch):
+    # The field and the plain search may pick different shortest paths, a shared cache keeps both plans
+    monkeypatch.setattr(BFS_LookAhead_Snake, 'use_plan_cache', True)
+    with_field = BFS_LookAhead_Snake(10, 10, seed=3, use_food_field=True)
+    without_field = BFS_LookAhead_Snake(10, 10, seed=3, use_food_field=False)
+    without_field.plan_cache = with_field.plan_cache
+
+    for snake in (with_field, without_field):
+        snake.finder.start, snake.finder.end = snake.head, snake.food
+        snake.find_path()
+    assert with_field.plan_cache.hits == 0 and len(with_field.plan_cache) == 2
+
+
+def test_plan_cache_of_a_game_keeps_to_its_memory_cap(monkeypatch):
+    monkeypatch.setattr(BFS_LookAhead_Snake, 'use_plan_cache', True)
+    snake = BFS_LookAhead_Snake(10, 10, seed=0)
+    snake.plan_cache = TranspositionCache(max_bytes=4 * TranspositionCache.ENTRY_BYTES + 40 * TranspositionCache.STEP_BYTES)
+    for _ in range(300):
+        if not snake.finder.path_exists():
+            snake.finder.start, snake.finder.end = snake.head, snake.food
+            snake.find_path()
+            assert snake.plan_cache.bytes <= snake.plan_cache.max_bytes
+            if not snake.finder.path_exists():
+                break
+        snake.step(snake.finder.path.pop(snake.head))
+    assert snake.plan_cache.evictions > 0
+    assert snake.plan_cache.bytes == sum(map(snake.plan_cache.entry_bytes, snake.plan_cache._entries.values()))
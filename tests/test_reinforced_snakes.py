@@ -0,0 +1,37 @@
+import pytest
+
+from helper import StepStatus
+from snakes.basesnake import OPPOSITE
+from snakes.reinforced_snakes import DQN_Snake
+
+
+# Grow a fresh snake straight ahead until it has `length` segments
+def grown_snake(length: int) -> DQN_Snake:
+    snake = DQN_Snake(10, 10, seed=0)
+    while snake._length < length:
+        snake.food = snake.head + snake.direction
+        snake._food_cell = snake.board.cell(snake.food)
+        assert snake.step(snake.direction)[0] == StepStatus.ATE
+    return snake
+
+
+@pytest.mark.parametrize('length, expected', [(2, (StepStatus.OK, 0)), (3, (StepStatus.BODY, -10))])
+def test_turning_back_collides_as_in_the_original_game(length, expected):
+    # With one body segment the neck is the tail, which moves out of the way,
+    # with more the head runs into its body
+    snake = grown_snake(length)
+    assert snake.step(OPPOSITE[snake.direction]) == expected
+
+
+def test_a_copy_shares_neither_the_memory_nor_the_models():
+    snake = DQN_Snake(10, 10, seed=0)
+    snake.memory.append('transition')
+    snake.epsilon = 0.5
+    virtual = snake.copy()
+
+    # The copy plays on without touching the replay memory or the models of the snake
+    assert virtual.epsilon == 0.5 and virtual.board is snake.board
+    for name in ('memory', 'q_net', 'optimizer'):
+        assert not hasattr(virtual, name)
+    virtual.step(virtual.direction)
+    assert list(snake.memory) == ['transition'] and snake.head != virtual.head
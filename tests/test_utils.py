@@ -0,0 +1,75 @@
+from collections import deque
+
+import pytest
+
+from snakes.pathfinding_snakes import BFS_LookAhead_Snake, BFS_LookAhead_LongerPath_Snake
+from snakes.utils import FoodDistanceField
+from tests.test_basesnake import random_moves
+
+
+# Distances from the source cell through the passable cells, by a plain BFS
+def bfs_distances(snake, source: int, passable) -> dict:
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        cell = queue.popleft()
+        for steps in snake.board.neighbours:
+            neighbour = steps[cell]
+            if neighbour >= 0 and neighbour not in distances and passable(neighbour):
+                distances[neighbour] = distances[cell] + 1
+                queue.append(neighbour)
+    return distances
+
+
+@pytest.mark.parametrize('agent', [BFS_LookAhead_Snake, BFS_LookAhead_LongerPath_Snake])
+def test_snake_options_turn_on_the_field_and_the_map(agent):
+    snake = agent(10, 10, seed=0, use_food_field=True, use_safety_map=True)
+    assert snake.food_field is not None and snake.safety_map is not None
+
+    snake = agent(10, 10, seed=0, use_food_field=False, use_safety_map=False)
+    assert snake.food_field is None and snake.safety_map is None
+
+
+def test_food_distance_field_matches_a_bfs_from_the_food():
+    snake = BFS_LookAhead_Snake(8, 9, seed=4, use_food_field=True)
+    field = snake.food_field
+    neighbours = snake.board.neighbours
+    for snake in random_moves(snake, 400, seed=4):
+        head = snake._ring[snake._head_pos]
+
+        def passable(cell):
+            return not snake._grid[cell] or cell == head
+
+        expected = bfs_distances(snake, snake._food_cell, passable)
+
+        dist, toward = field.dist, field.toward
+        for cell in range(snake.board.size):
+            if not passable(cell):
+                continue
+            assert dist[cell] == expected.get(cell, FoodDistanceField.UNREACHABLE)
+            if 0 < dist[cell] < FoodDistanceField.UNREACHABLE:
+                assert dist[neighbours[toward[cell]][cell]] == dist[cell] - 1
+
+
+def test_safety_map_matches_the_regions_of_a_bfs():
+    snake = BFS_LookAhead_Snake(8, 9, seed=5, use_safety_map=True)
+    safety_map = snake.safety_map
+    cells = snake.board.cells
+    for snake in random_moves(snake, 400, seed=5):
+        def free(cell):
+            return not snake._grid[cell]
+
+        for cell in range(snake.board.size):
+            expected = len(bfs_distances(snake, cell, free)) if free(cell) else 0
+            assert safety_map.region_size(cells[cell]) == expected
+
+
+def test_repaired_food_field_equals_a_rebuilt_one():
+    snake = BFS_LookAhead_Snake(8, 9, seed=6, use_food_field=True)
+    field = snake.food_field
+    for snake in random_moves(snake, 400, seed=6):
+        rebuilt = FoodDistanceField(snake)
+        assert list(field.dist) == list(rebuilt.dist)
+        assert list(field.toward) == list(rebuilt.toward)
+        rebuilt.close()
+    assert field.repairs > 0
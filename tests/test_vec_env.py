@@ -0,0 +1,99 @@
+import os
+import signal
+
+import numpy as np
+import pytest
+from multiprocessing.shared_memory import SharedMemory
+
+from helper import Direction, StepStatus
+from snakes.basesnake import DIRECTION_IDS
+from snakes.reinforced_snakes import DQN_Snake
+from vec_env import SubprocVecSnakeEnv, VecSnakeEnv, TURN, REWARD_DEATH, REWARD_FOOD
+
+
+# Put the food of the snake where the environment put it (the two draw the cells from different generators)
+def put_food(snake, cell: int) -> None:
+    snake._food_cell = int(cell)
+    snake.food = snake.board.cells[snake._food_cell]
+
+
+def test_states_match_the_dqn_snake():
+    # Every board is mirrored by a DQN snake playing the same actions
+    env = VecSnakeEnv(16, 6, 7, seed=8, max_idle_steps=60)
+    snakes = [DQN_Snake(6, 7, seed=i) for i in range(env.n_envs)]
+    for i, snake in enumerate(snakes):
+        put_food(snake, env.food[i])
+    np.testing.assert_array_equal(env.get_state(), [snake.get_state() for snake in snakes])
+
+    rng = np.random.default_rng(8)
+    for _ in range(400):
+        actions = rng.integers(0, 3, env.n_envs)
+        directions = [Direction.MOVES[TURN[DIRECTION_IDS[snake.direction], action]] for snake, action in zip(snakes, actions)]
+        states, rewards, dones, scores = env.step(actions)
+
+        for i, (snake, direction) in enumerate(zip(snakes, directions)):
+            status, _ = snake.step(direction)
+            assert (rewards[i] == REWARD_DEATH) == (status in (StepStatus.WALL, StepStatus.BODY))
+            assert (rewards[i] == REWARD_FOOD) == (status == StepStatus.ATE)
+            assert scores[i] == snake.score
+            if dones[i]:
+                snake.reset()
+            put_food(snake, env.food[i])
+            np.testing.assert_array_equal(states[i], snake.get_state())
+
+
+# Whether the shared buffers of the environment are gone
+def unlinked(names) -> bool:
+    for name in names:
+        try:
+            SharedMemory(name=name).close()
+        except FileNotFoundError:
+            continue
+        return False
+    return True
+
+
+def test_dead_worker_raises_and_closes_the_environment():
+    env = SubprocVecSnakeEnv(8, 6, 6, n_workers=2, seed=3, timeout=2)
+    names = [block.name for block in env.blocks.values()]
+    env.reset()
+
+    os.kill(env.workers[1].pid, signal.SIGKILL)
+    env.workers[1].join()
+    with pytest.raises(RuntimeError):
+        env.step(np.zeros(8, dtype=np.int64))
+
+    assert env.closed and unlinked(names)
+    assert not any(worker.is_alive() for worker in env.workers)
+    with pytest.raises(RuntimeError):
+        env.reset()
+
+
+def test_garbage_collection_stops_the_workers_and_frees_the_memory():
+    env = SubprocVecSnakeEnv(8, 6, 6, n_workers=2, seed=3)
+    names = [block.name for block in env.blocks.values()]
+    workers = env.workers
+    env.reset()
+
+    del env
+    assert unlinked(names)
+    assert [worker.exitcode for worker in workers] == [0, 0]
+
+
+def test_subprocess_environment_plays_like_a_vec_env_per_worker():
+    # Worker i plays its slice of the boards like a `VecSnakeEnv` seeded with `seed + i`
+    with SubprocVecSnakeEnv(10, 6, 7, n_workers=2, seed=5, max_idle_steps=40) as env:
+        slices = [VecSnakeEnv(5, 6, 7, seed=5 + i, max_idle_steps=40) for i in range(2)]
+        np.testing.assert_array_equal(env.get_state(), np.concatenate([part.get_state() for part in slices]))
+
+        rng = np.random.default_rng(5)
+        for step in range(200):
+            if step == 100:
+                np.testing.assert_array_equal(env.reset(), np.concatenate([part.reset() for part in slices]))
+            else:
+                actions = rng.integers(0, 3, env.n_envs)
+                results = env.step(actions)
+                expected = zip(*[part.step(actions[5 * i:5 * (i + 1)]) for i, part in enumerate(slices)])
+                for result, parts in zip(results, expected):
+                    np.testing.assert_array_equal(result, np.concatenate(parts))
+            np.testing.assert_array_equal(env.get_state(), np.concatenate([part.get_state() for part in slices]))
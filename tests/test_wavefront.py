@@ -0,0 +1,106 @@
+from collections import deque
+
+import numpy as np
+
+from helper import Direction
+from snakes.basesnake import DIRECTION_IDS
+from snakes.pathfinding_snakes import BFS_Basic_Snake
+from tests.test_utils import bfs_distances
+from tests.test_vec_env import put_food
+from vec_env import VecSnakeEnv, TURN
+from wavefront import wavefront_actions, wavefront_distances, UNREACHED
+
+
+# BFS distances from the source over the open cells of a single (H, W) board (-1 for cells not reached)
+def board_distances(blocked: np.ndarray, source: int) -> np.ndarray:
+    height, width = blocked.shape
+    distances = np.full(blocked.shape, UNREACHED, dtype=np.int32)
+    if source < 0:
+        return distances
+
+    distances.flat[source] = 0
+    queue = deque([divmod(source, width)])
+    while queue:
+        y, x = queue.popleft()
+        for ny, nx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+            if 0 <= ny < height and 0 <= nx < width and not blocked[ny, nx] and distances[ny, nx] == UNREACHED:
+                distances[ny, nx] = distances[y, x] + 1
+                queue.append((ny, nx))
+    return distances
+
+
+# Random boards with about a third of the cells blocked, a source on most of them (blocked sources included)
+def random_boards(rng: np.random.Generator, n_boards: int, height: int, width: int) -> tuple:
+    blocked = rng.random((n_boards, height, width)) < 0.35
+    sources = rng.integers(0, height * width, n_boards)
+    sources[rng.random(n_boards) < 0.1] = -1
+    return blocked, sources
+
+
+def test_wavefront_distances_match_a_bfs_per_board():
+    rng = np.random.default_rng(0)
+    for height, width in ((1, 1), (1, 9), (9, 1), (6, 7), (12, 12)):
+        blocked, sources = random_boards(rng, 50, height, width)
+        distances = wavefront_distances(blocked, sources)
+        for board in range(len(blocked)):
+            np.testing.assert_array_equal(distances[board], board_distances(blocked[board], sources[board]))
+
+
+def test_wavefront_stops_at_the_targets():
+    rng = np.random.default_rng(1)
+    blocked, sources = random_boards(rng, 100, 10, 10)
+    targets = rng.integers(0, 100, len(blocked))
+    targets[rng.random(len(blocked)) < 0.1] = -1
+    distances = wavefront_distances(blocked, sources, targets)
+
+    for board in range(len(blocked)):
+        expected = board_distances(blocked[board], sources[board])
+        reached = distances[board] != UNREACHED
+
+        # Every distance stamped is exact, and so is the one of the target
+        np.testing.assert_array_equal(distances[board][reached], expected[reached])
+        if targets[board] >= 0:
+            assert distances[board].flat[targets[board]] == expected.flat[targets[board]]
+
+            # The wave got at least as far out as the target
+            if expected.flat[targets[board]] != UNREACHED:
+                assert reached[(expected != UNREACHED) & (expected <= expected.flat[targets[board]])].all()
+
+
+def test_wavefront_actions_follow_a_shortest_path_of_the_bfs_snake():
+    # Every board is mirrored by a BFS snake playing the same actions
+    env = VecSnakeEnv(16, 8, 8, seed=3, max_idle_steps=100)
+    snakes = [BFS_Basic_Snake(8, 8, seed=i) for i in range(env.n_envs)]
+    for i, snake in enumerate(snakes):
+        put_food(snake, env.food[i])
+
+    paths = 0
+    for _ in range(300):
+        actions = wavefront_actions(env)
+        for snake, action in zip(snakes, actions):
+            snake.finder.start, snake.finder.end = snake.head, snake.food
+            snake.find_path()
+            direction = Direction.MOVES[TURN[DIRECTION_IDS[snake.direction], action]]
+            cell = snake.board.neighbours[DIRECTION_IDS[direction]][snake._ring[snake._head_pos]]
+
+            def free(cell):
+                return not snake._grid[cell]
+
+            # The move starts a path to the food as short as the one of the snake, if there is one
+            distances = bfs_distances(snake, snake._food_cell, free)
+            if snake.finder.path:
+                assert cell >= 0 and distances.get(cell) == len(snake.finder.path) - 1
+                paths += 1
+            else:
+                assert all(
+                    distances.get(steps[snake._ring[snake._head_pos]]) is None
+                    for steps in snake.board.neighbours
+                )
+
+        _, _, dones, _ = env.step(actions)
+        for i, (snake, action) in enumerate(zip(snakes, actions)):
+            snake.step(Direction.MOVES[TURN[DIRECTION_IDS[snake.direction], action]])
+            if dones[i]:
+                snake.reset()
+            put_food(snake, env.food[i])
+    assert paths > 0